@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class ApiConfig(AppConfig):
     name = "api"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .checks import check_shared_cache
+
+        checks.register(check_shared_cache, checks.Tags.caches)
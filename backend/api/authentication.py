@@ -0,0 +1,144 @@
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from monitoring.metrics import cache_lookup
+from users.models import AuthToken, hash_token_key
+
+User = get_user_model()
+
+# Порядок полей совпадает с порядком колонок модели, как требует from_db.
+USER_HOT_FIELDS = tuple(
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname in {
+        "id",
+        "email",
+        "username",
+        "first_name",
+        "last_name",
+        "avatar",
+        "is_active",
+        "is_staff",
+        "is_superuser",
+    }
+)
+
+
+class LocalLRUCache:
+    """Потокобезопасный LRU-кэш процесса с ограниченным временем жизни."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_token_cache = LocalLRUCache(
+    settings.TOKEN_CACHE_LOCAL_SIZE, settings.TOKEN_CACHE_LOCAL_TTL
+)
+
+
+def token_cache_key(digest):
+    return f"auth-token:{digest}"
+
+
+def invalidate_token(digest):
+    cache_key = token_cache_key(digest)
+    local_token_cache.delete(cache_key)
+    cache.delete(cache_key)
+
+
+def build_user(values):
+    """Собрать пользователя из горячих полей без обращения к БД.
+
+    Остальные поля отложены: save() обновит только загруженные поля.
+    """
+    return User.from_db(DEFAULT_DB_ALIAS, USER_HOT_FIELDS, values)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по хэшированным токенам с двухуровневым кэшем.
+
+    Первый уровень - LRU внутри процесса, второй - общий кэш Django.
+    Промах кэша - один запрос по индексу префикса и сравнение хэшей за
+    постоянное время. Записи сбрасываются сигналами при выходе, смене
+    пароля и деактивации пользователя.
+    """
+
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        digest = hash_token_key(key)
+        cache_key = token_cache_key(digest)
+        entry = local_token_cache.get(cache_key)
+        cache_lookup("token_local", entry is not None)
+        if entry is None:
+            entry = cache.get(cache_key)
+            cache_lookup("token_shared", entry is not None)
+            if entry is None:
+                entry = self.fetch_entry(key, digest)
+                cache.set(cache_key, entry, settings.TOKEN_CACHE_TTL)
+            local_token_cache.set(cache_key, entry)
+        expires, values = entry
+        if expires is not None and expires <= time.time():
+            invalidate_token(digest)
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not values[USER_HOT_FIELDS.index("is_active")]:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted."))
+        return build_user(values), key
+
+    def fetch_entry(self, key, digest):
+        rows = self.model.objects.filter(
+            prefix=self.model.split_key(key)
+        ).values_list(
+            "digest",
+            "expires",
+            *(f"user__{field}" for field in USER_HOT_FIELDS),
+        )
+        for row_digest, expires, *values in rows:
+            if hmac.compare_digest(row_digest, digest):
+                if expires is not None:
+                    expires = expires.timestamp()
+                return expires, tuple(values)
+        raise exceptions.AuthenticationFailed(_("Invalid token."))
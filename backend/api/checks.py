@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Кэш токенов и счётчики ограничений должны быть общими для воркеров.
+
+    С LocMemCache выход из системы и смена пароля сбрасывают токен только
+    в воркере, обработавшем запрос, а лимиты умножаются на число воркеров.
+    """
+    if settings.WEB_WORKERS > 1 and isinstance(caches["default"],
+                                               LocMemCache):
+        return [Error(
+            f"LocMemCache не разделяется между {settings.WEB_WORKERS} "
+            "воркерами gunicorn.",
+            hint="Укажите CACHE_BACKEND=django.core.cache.backends."
+                 "memcached.PyMemcacheCache и CACHE_LOCATION или "
+                 "GUNICORN_WORKERS=1.",
+            id="api.E001",
+        )]
+    return []
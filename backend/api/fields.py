@@ -1,13 +1,36 @@
 import base64
 
 from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import UploadedFile
 from rest_framework import serializers
 
+from monitoring.metrics import IMAGE_DECODE_DURATION, timed
+from users.avatars import check_upload, decode_base64, downscale
+
 
 class Base64ImageField(serializers.ImageField):
     def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
-        return super().to_internal_value(data)
+        with timed(IMAGE_DECODE_DURATION):
+            if isinstance(data, str) and data.startswith("data:image"):
+                format, imgstr = data.split(";base64,")
+                ext = format.split("/")[-1]
+                data = ContentFile(
+                    base64.b64decode(imgstr), name="temp." + ext)
+            return super().to_internal_value(data)
+
+
+class AvatarField(serializers.ImageField):
+    """Аватар строкой data URL в base64 или файлом (multipart, тело запроса).
+
+    Возвращает уменьшенные копии изображения (см. users.avatars.downscale).
+    """
+
+    def to_internal_value(self, data):
+        with timed(IMAGE_DECODE_DURATION):
+            if isinstance(data, str):
+                stream = decode_base64(data)
+            elif isinstance(data, UploadedFile):
+                stream = check_upload(data)
+            else:
+                self.fail("invalid")
+            return downscale(stream)
@@ -9,6 +9,11 @@ class RecipeFilter(FilterSet):
     is_favorited = filters.BooleanFilter(method="filter_is_favorited")
     is_in_shopping_cart = filters.BooleanFilter(
         method="filter_is_in_shopping_cart")
+    # Предрассчитанные значения на порцию, по индексам recipe_calories_idx
+    # и recipe_cost_idx. Рецепты без данных не попадают в выборку.
+    max_calories = filters.NumberFilter(
+        field_name="calories", lookup_expr="lte")
+    max_cost = filters.NumberFilter(field_name="cost", lookup_expr="lte")
 
     class Meta:
         model = Recipe
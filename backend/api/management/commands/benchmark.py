@@ -0,0 +1,176 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from recipes.models import Recipe, RecipeSimilarity, Tag
+from users.models import AuthToken, User
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def is_empty(response):
+    """Ответ без данных: пустой список или страница без результатов."""
+    if response.status_code != 200:
+        return False
+    if response.get("Content-Type") != "application/json":
+        return not response.content
+    data = response.json()
+    if isinstance(data, dict) and "results" in data:
+        data = data["results"]
+    return not data
+
+
+class Command(BaseCommand):
+    help = (
+        "Воспроизводимый нагрузочный прогон основных эндпоинтов: "
+        "p50/p95/p99, процессорное время и число SQL-запросов на запрос."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument(
+            "--scenario", action="append",
+            help="Запустить только указанные сценарии")
+        parser.add_argument(
+            "--json", dest="json_path", help="Сохранить результаты в JSON")
+
+    def get_scenarios(self):
+        user = (
+            User.objects.filter(
+                favorites__isnull=False, shopping_cart__isnull=False,
+                subscriptions_received__isnull=False,
+            )
+            .order_by("id").first()
+        )
+        recipe = Recipe.objects.exclude(short_link=None).order_by(
+            "-id").first()
+        calories = Recipe.objects.exclude(calories=None).order_by(
+            "calories").values_list("calories", flat=True)
+        with_calories = calories.count()
+        if user is None or recipe is None or not with_calories:
+            raise CommandError("База пуста, сначала выполните generate_data")
+        host, short_code = recipe.short_link.split("/s/")
+        tag = Tag.objects.order_by("id").first()
+        similar = RecipeSimilarity.objects.values_list(
+            "recipe_id", flat=True).first()
+        # Медиана калорийности: фильтр отбирает около половины рецептов
+        # при любых сгенерированных данных.
+        median_calories = calories[with_calories // 2]
+        return user, [
+            ("recipe_list", "/api/recipes/", {}, False),
+            ("recipe_list_auth", "/api/recipes/", {}, True),
+            ("recipe_list_page_10", "/api/recipes/?page=10", {}, True),
+            ("recipe_detail", f"/api/recipes/{recipe.id}/", {}, True),
+            ("filter_tags", f"/api/recipes/?tags={tag.slug}", {}, True),
+            ("filter_author",
+             f"/api/recipes/?author={recipe.author_id}", {}, True),
+            ("filter_favorited", "/api/recipes/?is_favorited=1", {}, True),
+            ("filter_cart", "/api/recipes/?is_in_shopping_cart=1", {}, True),
+            ("filter_max_calories",
+             f"/api/recipes/?max_calories={median_calories}", {}, True),
+            ("user_list", "/api/users/", {}, True),
+            ("subscriptions", "/api/users/subscriptions/", {}, True),
+            ("download_shopping_cart",
+             "/api/recipes/download_shopping_cart/", {}, True),
+            ("short_link", f"/s/{short_code}/", {"HTTP_HOST": host}, False),
+        ] + ([
+            ("recipe_similar", f"/api/recipes/{similar}/similar/", {}, True),
+            ("recommended", "/api/recipes/recommended/", {}, True),
+        ] if similar else [])
+
+    def get_targets(self):
+        """Цели по p99 в мс для сценариев, у которых они есть."""
+        return {
+            "recipe_similar": settings.RECOMMENDATIONS_P99_TARGET_MS,
+            "recommended": settings.RECOMMENDATIONS_P99_TARGET_MS,
+        }
+
+    def handle(self, *args, **options):
+        user, scenarios = self.get_scenarios()
+        if options["scenario"]:
+            scenarios = [
+                scenario for scenario in scenarios
+                if scenario[0] in options["scenario"]
+            ]
+        token, key = AuthToken.objects.create_token(user)
+        rest_framework = {
+            **settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_CLASSES": []}
+        results = {}
+        try:
+            with override_settings(
+                    ALLOWED_HOSTS=["*"], REST_FRAMEWORK=rest_framework):
+                for name, url, extra, authenticated in scenarios:
+                    headers = dict(extra)
+                    if authenticated:
+                        headers["HTTP_AUTHORIZATION"] = f"Token {key}"
+                    results[name] = self.measure(
+                        url, headers, options["iterations"])
+                    self.report(name, results[name])
+        finally:
+            token.delete()
+        if options["json_path"]:
+            with open(options["json_path"], "w") as file:
+                json.dump(results, file, indent=2)
+        errors = []
+        empty = [name for name, result in results.items() if result["empty"]]
+        if empty:
+            # Пустой ответ измеряет не тот запрос, что в эксплуатации.
+            errors.append(f"Пустой ответ: {', '.join(empty)}")
+        missed = [
+            f"{name} ({results[name]['p99_ms']} > {target} мс)"
+            for name, target in self.get_targets().items()
+            if name in results and results[name]["p99_ms"] > target
+        ]
+        if missed:
+            errors.append(f"Цель по p99 не выполнена: {', '.join(missed)}")
+        if errors:
+            raise CommandError("; ".join(errors))
+
+    def measure(self, url, headers, iterations):
+        client = Client(**headers)
+        client.get(url)
+        timings = []
+        cpu_times = []
+        queries = []
+        sizes = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                cpu_started = time.process_time()
+                response = client.get(url)
+                cpu_times.append((time.process_time() - cpu_started) * 1000)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f"{url}: HTTP {response.status_code}")
+            queries.append(len(context))
+            sizes.append(len(response.content))
+        return {
+            "url": url,
+            "p50_ms": round(percentile(timings, 0.50), 2),
+            "p95_ms": round(percentile(timings, 0.95), 2),
+            "p99_ms": round(percentile(timings, 0.99), 2),
+            "cpu_ms": round(statistics.mean(cpu_times), 2),
+            "queries": statistics.mean(queries),
+            "bytes": statistics.mean(sizes),
+            "empty": is_empty(response),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<24} p50 {result['p50_ms']:>8.2f} мс  "
+            f"p95 {result['p95_ms']:>8.2f} мс  "
+            f"p99 {result['p99_ms']:>8.2f} мс  "
+            f"CPU {result['cpu_ms']:>8.2f} мс  "
+            f"SQL {result['queries']:>6.1f}  "
+            f"{result['bytes']:>8.0f} Б"
+        )
@@ -1,5 +1,11 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (LimitOffsetPagination,
+                                       PageNumberPagination)
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from foodgram.pagination import estimated_count
+from .readers import parse_limit
 
 
 class CustomPagination(PageNumberPagination):
@@ -15,3 +21,52 @@ class CustomPagination(PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class EstimatedCountPagination(LimitOffsetPagination):
+    """Limit/offset без COUNT(*) по всей большой таблице.
+
+    Для списка без фильтров count берётся из статистики PostgreSQL и
+    может быть приблизительным; отфильтрованные списки считаются точно.
+    """
+
+    max_limit = 100
+
+    def get_count(self, queryset):
+        estimate = estimated_count(queryset)
+        if estimate is not None:
+            return estimate
+        # Только ключи: аннотации вроде is_subscribed не вычисляются в COUNT.
+        return super().get_count(queryset.order_by().values("pk"))
+
+
+class FeedCursorPagination:
+    """Курсорная пагинация ленты: курсор - id последнего рецепта
+    страницы, следующая страница начинается со следующего по убыванию."""
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    page_size = 6
+    max_page_size = 100
+
+    def get_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if raw is None:
+            return None
+        if not raw.isdigit():
+            raise ValidationError(
+                {self.cursor_query_param: "Некорректный курсор"})
+        return int(raw)
+
+    def get_limit(self, request):
+        return parse_limit(
+            request, self.page_size, self.max_page_size,
+            self.page_size_query_param)
+
+    def get_paginated_response(self, request, data, next_cursor):
+        next_link = None
+        if next_cursor is not None:
+            next_link = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param, next_cursor)
+        return Response({"next": next_link, "results": data})
@@ -0,0 +1,15 @@
+from rest_framework.parsers import DataAndFiles, FileUploadParser
+
+
+class AvatarUploadParser(FileUploadParser):
+    """Изображение телом запроса (Content-Type: image/*), без base64."""
+
+    media_type = "image/*"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parsed = super().parse(stream, media_type, parser_context)
+        return DataAndFiles({}, {"avatar": parsed.files["file"]})
+
+    def get_filename(self, stream, media_type, parser_context):
+        return super().get_filename(
+            stream, media_type, parser_context) or "avatar"
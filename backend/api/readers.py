@@ -0,0 +1,231 @@
+from collections import defaultdict
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Exists, OuterRef, Value
+from django.utils.encoding import filepath_to_uri
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import Favourite, Recipe, ShoppingCart
+from recipes.nutrition import NUTRITION_FIELDS, nutrition_representation
+from recipes.registry import tag_registry
+from recipes.snapshots import snapshot_to_representation
+from users.models import Subscribe, User
+
+
+def file_url_builder(request, model, field_name):
+    """Собрать функцию имя файла -> абсолютный URL, как у ImageField DRF.
+
+    Для файлового хранилища префикс вычисляется один раз на запрос.
+    """
+    storage = model._meta.get_field(field_name).storage
+    if isinstance(storage, FileSystemStorage):
+        prefix = request.build_absolute_uri(storage.base_url)
+
+        def build(name):
+            if not name:
+                return None
+            return prefix + filepath_to_uri(name).lstrip("/")
+    else:
+        def build(name):
+            if not name:
+                return None
+            return request.build_absolute_uri(storage.url(name))
+    return build
+
+
+def parse_field_list(request, param, allowed):
+    """Разобрать ?param=a,b,c. None, если параметр не передан."""
+    raw = request.query_params.get(param)
+    if raw is None:
+        return None
+    names = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = names.difference(allowed)
+    if unknown:
+        raise ValidationError(
+            {param: f"Неизвестные поля: {', '.join(sorted(unknown))}"})
+    return [name for name in allowed if name in names]
+
+
+def parse_limit(request, default, maximum, param="limit"):
+    """Положительное ?limit= не больше maximum, иначе default."""
+    raw = request.query_params.get(param, "")
+    if not raw.isdigit() or not int(raw):
+        return default
+    return min(int(raw), maximum)
+
+
+class RecipeReader:
+    """Быстрый путь чтения рецептов без ModelSerializer.
+
+    Строки берутся через .values() с аннотациями Exists, ингредиенты - из
+    снимка в строке рецепта, связи с тегами страницы - одним запросом,
+    сами теги - из реестра процесса. Формат ответа совпадает с
+    RecipeSerializer (short_link там не выводится: у модели нет атрибута
+    get_short_link).
+
+    ?fields= оставляет только перечисленные поля, ?expand= - вложенными
+    только перечисленные связи, остальные отдаются идентификаторами.
+    Колонки, аннотации и запросы для невыбранных полей не выполняются.
+    """
+
+    fields = (
+        "id",
+        "tags",
+        "author",
+        "ingredients",
+        "is_favorited",
+        "is_in_shopping_cart",
+        "name",
+        "image",
+        "text",
+        "cooking_time",
+        "servings",
+        "nutrition",
+    )
+    expandable = ("tags", "author", "ingredients")
+    field_columns = {
+        "name": ("name",),
+        "image": ("image",),
+        "text": ("text",),
+        "cooking_time": ("cooking_time",),
+        "servings": ("servings",),
+        "nutrition": NUTRITION_FIELDS,
+        "author": ("author_id",),
+        "ingredients": ("ingredients_snapshot",),
+    }
+    author_columns = (
+        "author__email", "author__username", "author__first_name",
+        "author__last_name", "author__avatar",
+    )
+
+    def __init__(self, request, fields=None, expand=None):
+        self.request = request
+        self.user = request.user
+        self.selected = fields or self.fields
+        self.expand = set(self.expandable if expand is None else expand)
+        self.image_url = file_url_builder(request, Recipe, "image")
+        self.avatar_url = file_url_builder(request, User, "avatar")
+        self.extractors = [
+            (name, getattr(self, f"extract_{name}")) for name in self.selected
+        ]
+
+    @classmethod
+    def from_request(cls, request):
+        return cls(
+            request,
+            fields=parse_field_list(request, "fields", cls.fields),
+            expand=parse_field_list(request, "expand", cls.expandable),
+        )
+
+    def wants(self, name, expanded=False):
+        return name in self.selected and (
+            not expanded or name in self.expand)
+
+    def queryset(self, queryset):
+        columns = ["id"]
+        for name in self.selected:
+            columns.extend(self.field_columns.get(name, ()))
+        if self.wants("author", expanded=True):
+            columns.extend(self.author_columns)
+        annotations = {}
+        if self.wants("is_favorited"):
+            annotations["is_favorited"] = self.user_exists(
+                Favourite, recipe=OuterRef("pk"))
+        if self.wants("is_in_shopping_cart"):
+            annotations["is_in_shopping_cart"] = self.user_exists(
+                ShoppingCart, recipe=OuterRef("pk"))
+        if self.wants("author", expanded=True):
+            annotations["author_is_subscribed"] = self.user_exists(
+                Subscribe, author=OuterRef("author_id"))
+        return queryset.annotate(**annotations).values(
+            *columns, *annotations)
+
+    def user_exists(self, model, **lookups):
+        if not self.user.is_authenticated:
+            return Value(False)
+        return Exists(model.objects.filter(user=self.user, **lookups))
+
+    def render(self, rows):
+        rows = list(rows)
+        ids = [row["id"] for row in rows]
+        if self.wants("tags"):
+            self.tags = self.load_tags(ids)
+        return [
+            {name: extract(row) for name, extract in self.extractors}
+            for row in rows
+        ]
+
+    def render_one(self, row):
+        return self.render([row])[0]
+
+    def render_ids(self, queryset, ids):
+        """Рецепты ids в заданном порядке, удалённые пропускаются."""
+        rows = {
+            row["id"]: row
+            for row in self.queryset(queryset.filter(id__in=ids))
+        }
+        return self.render([rows[pk] for pk in ids if pk in rows])
+
+    def load_tags(self, recipe_ids):
+        through = Recipe.tags.through
+        links = through.objects.filter(recipe_id__in=recipe_ids).order_by(
+            "tag_id").values_list("recipe_id", "tag_id")
+        result = defaultdict(list)
+        if not self.wants("tags", expanded=True):
+            for recipe_id, tag_id in links:
+                result[recipe_id].append(tag_id)
+            return result
+        tags = tag_registry.tags()
+        for recipe_id, tag_id in links:
+            result[recipe_id].append(tags[tag_id])
+        return result
+
+    def extract_id(self, row):
+        return row["id"]
+
+    def extract_tags(self, row):
+        return self.tags.get(row["id"], [])
+
+    def extract_author(self, row):
+        if row["author_id"] is None or "author" not in self.expand:
+            return row["author_id"]
+        return {
+            "email": row["author__email"],
+            "id": row["author_id"],
+            "username": row["author__username"],
+            "first_name": row["author__first_name"],
+            "last_name": row["author__last_name"],
+            "is_subscribed": row["author_is_subscribed"],
+            "avatar": self.avatar_url(row["author__avatar"]),
+        }
+
+    def extract_ingredients(self, row):
+        snapshot = row["ingredients_snapshot"]
+        if "ingredients" in self.expand:
+            return snapshot_to_representation(snapshot)
+        return [{"id": pk, "amount": amount} for pk, *_, amount in snapshot]
+
+    def extract_is_favorited(self, row):
+        return row["is_favorited"]
+
+    def extract_is_in_shopping_cart(self, row):
+        return row["is_in_shopping_cart"]
+
+    def extract_name(self, row):
+        return row["name"]
+
+    def extract_image(self, row):
+        return self.image_url(row["image"])
+
+    def extract_text(self, row):
+        return row["text"]
+
+    def extract_cooking_time(self, row):
+        return row["cooking_time"]
+
+    def extract_servings(self, row):
+        return row["servings"]
+
+    def extract_nutrition(self, row):
+        return nutrition_representation(
+            row[name] for name in NUTRITION_FIELDS)
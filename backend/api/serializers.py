@@ -1,4 +1,5 @@
-from django.db.models import F
+from django.conf import settings
+from django.db import transaction
 from django.utils.crypto import get_random_string
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
@@ -7,9 +8,15 @@ from rest_framework.fields import IntegerField, SerializerMethodField
 
 from recipes.models import (Favourite, Ingredient, IngredientRecipe, Recipe,
                             ShoppingCart, Tag)
+from recipes.nutrition import (NUTRITION_FIELDS, REFERENCE_FIELDS,
+                               nutrition_representation, reference_values,
+                               rollup)
+from recipes.registry import tag_registry
+from recipes.snapshots import snapshot_item, snapshot_to_representation
+from users.avatars import replace_avatar
 from users.models import Subscribe, User
 from users.validators import validate_username
-from .fields import Base64ImageField
+from .fields import AvatarField, Base64ImageField
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -28,7 +35,18 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         return validate_username(value)
 
 
-class CustomUserSerializer(UserSerializer):
+class SparseFieldsMixin:
+    """Оставить в сериализаторе только поля из context["fields"]."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CustomUserSerializer(SparseFieldsMixin, UserSerializer):
     is_subscribed = SerializerMethodField(read_only=True)
     avatar = Base64ImageField(required=False, allow_null=True)
 
@@ -44,9 +62,19 @@ class CustomUserSerializer(UserSerializer):
             "avatar",
         )
 
+    @classmethod
+    def get_columns(cls, fields):
+        """Колонки модели, нужные для вывода полей."""
+        columns = {
+            field.name for field in cls.Meta.model._meta.concrete_fields}
+        return [name for name in fields if name in columns] or ["id"]
+
     def get_is_subscribed(self, obj):
+        # Списки пользователей приходят с аннотацией из CustomUserViewSet.
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = self.context.get("request").user
-        if user.is_anonymous:
+        if user.is_anonymous or user.pk == obj.pk:
             return False
         return Subscribe.objects.filter(user=user, author=obj).exists()
 
@@ -68,6 +96,9 @@ class SubscribeSerializer(CustomUserSerializer):
         recipes = obj.recipes.all()
         if limit:
             recipes = recipes[: int(limit)]
+        expand = self.context.get("expand")
+        if expand is not None and "recipes" not in expand:
+            return list(recipes.values_list("id", flat=True))
         serializer = RecipeShortSerializer(recipes, many=True, read_only=True)
         return serializer.data
 
@@ -109,20 +140,25 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class AvatarSerializer(serializers.ModelSerializer):
-    avatar = Base64ImageField(required=True, allow_null=True)
+    avatar = AvatarField(required=True, allow_null=True)
 
     class Meta:
         model = User
         fields = ["avatar"]
 
+    def update(self, instance, validated_data):
+        replace_avatar(instance, validated_data["avatar"])
+        return instance
+
 
 class RecipeSerializer(serializers.ModelSerializer):
-    tags = TagSerializer(many=True, read_only=True)
+    tags = SerializerMethodField()
     author = CustomUserSerializer(read_only=True)
     ingredients = SerializerMethodField()
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
     image = Base64ImageField(required=False, allow_null=True)
+    nutrition = SerializerMethodField()
     short_link = serializers.CharField(source="get_short_link", read_only=True)
 
     class Meta:
@@ -138,14 +174,18 @@ class RecipeSerializer(serializers.ModelSerializer):
             "image",
             "text",
             "cooking_time",
+            "servings",
+            "nutrition",
             "short_link",
         )
 
+    def get_tags(self, obj):
+        tag_ids = Recipe.tags.through.objects.filter(recipe=obj).order_by(
+            "tag_id").values_list("tag_id", flat=True)
+        return tag_registry.resolve(tag_ids)
+
     def get_ingredients(self, obj):
-        return obj.ingredients.annotate(amount=F(
-            "ingredientrecipe__amount")).values(
-            "id", "name", "measurement_unit", "amount"
-        )
+        return snapshot_to_representation(obj.ingredients_snapshot)
 
     def get_is_favorited(self, obj):
         user = self.context["request"].user
@@ -161,6 +201,10 @@ class RecipeSerializer(serializers.ModelSerializer):
             and ShoppingCart.objects.filter(user=user, recipe=obj).exists()
         )
 
+    def get_nutrition(self, obj):
+        return nutrition_representation(
+            getattr(obj, name) for name in NUTRITION_FIELDS)
+
     def get_short_link(self, obj):
         return obj.short_link
 
@@ -174,9 +218,7 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
 
 
 class RecipePostSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Tag.objects.all(), required=True
-    )
+    tags = serializers.ListField(child=IntegerField(), required=True)
     author = CustomUserSerializer(read_only=True)
     ingredients = IngredientRecipeSerializer(many=True)
     image = Base64ImageField()
@@ -193,6 +235,7 @@ class RecipePostSerializer(serializers.ModelSerializer):
             "image",
             "text",
             "cooking_time",
+            "servings",
             "short_link",
         )
 
@@ -217,6 +260,17 @@ class RecipePostSerializer(serializers.ModelSerializer):
                      "Количество ингредиентов должно быть больше нуля"}
                 )
             unique_ingredients.add(ingredient_id)
+        found = Ingredient.objects.only(
+            "id", "name", "measurement_unit", *REFERENCE_FIELDS
+        ).in_bulk(unique_ingredients)
+        missing = unique_ingredients.difference(found)
+        if missing:
+            raise ValidationError(
+                {"ingredients": "Несуществующие ингредиенты: "
+                 + ", ".join(map(str, sorted(missing)))}
+            )
+        for item in ingredients:
+            item["ingredient"] = found[item["id"]]
         return ingredients
 
     def validate_tags(self, tags):
@@ -224,6 +278,12 @@ class RecipePostSerializer(serializers.ModelSerializer):
             raise ValidationError({"tags": "Нужно выбрать тег"})
         if len(tags) != len(set(tags)):
             raise ValidationError({"tags": "Тег не должен повторяться"})
+        unknown = set(tags).difference(tag_registry.ids())
+        if unknown:
+            raise ValidationError(
+                {"tags": "Несуществующие теги: "
+                 + ", ".join(map(str, sorted(unknown)))}
+            )
         return tags
 
     def create_short_link(self):
@@ -231,6 +291,7 @@ class RecipePostSerializer(serializers.ModelSerializer):
         current_domain = self.context["request"].get_host()
         return f"{current_domain}/s/{get_random_string(length=LINK_LENGTH)}"
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
@@ -240,6 +301,7 @@ class RecipePostSerializer(serializers.ModelSerializer):
         self._create_ingredient_recipes(recipe, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
@@ -250,16 +312,35 @@ class RecipePostSerializer(serializers.ModelSerializer):
         return instance
 
     def _create_ingredient_recipes(self, recipe, ingredients):
-        IngredientRecipe.objects.bulk_create(
-            [
-                IngredientRecipe(
-                    recipe=recipe,
-                    ingredient_id=ingredient["id"],
-                    amount=ingredient["amount"],
-                )
-                for ingredient in ingredients
-            ]
+        """Связи, снимок и пищевая ценность по уже загруженным в
+        validate_ingredients объектам Ingredient, без повторного запроса."""
+        links = [
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient=item["ingredient"],
+                amount=item["amount"],
+            )
+            for item in ingredients
+        ]
+        for link in links:
+            link.fill_base()
+        IngredientRecipe.objects.bulk_create(links)
+        recipe.ingredients_snapshot = [
+            snapshot_item(item["ingredient"], item["amount"])
+            for item in ingredients
+        ]
+        values = rollup(
+            [(recipe.id, link.ingredient_id, link.base_amount)
+             for link in links],
+            {
+                item["ingredient"].id: reference_values(item["ingredient"])
+                for item in ingredients
+            },
+            {recipe.id: recipe.servings},
         )
+        for name, value in zip(NUTRITION_FIELDS, values[recipe.id]):
+            setattr(recipe, name, value)
+        recipe.save(update_fields=["ingredients_snapshot", *NUTRITION_FIELDS])
 
     def to_representation(self, instance):
         context = {"request": self.context["request"]}
@@ -299,3 +380,26 @@ class FavoriteCreateSerializer(serializers.Serializer):
         favourite, created = Favourite.objects.get_or_create(
             user=user, recipe=recipe)
         return favourite
+
+
+class RecipeBatchSerializer(serializers.Serializer):
+    add = serializers.ListField(
+        child=IntegerField(min_value=1),
+        required=False,
+        default=list,
+        max_length=settings.RECIPE_BATCH_MAX_SIZE,
+    )
+    remove = serializers.ListField(
+        child=IntegerField(min_value=1),
+        required=False,
+        default=list,
+        max_length=settings.RECIPE_BATCH_MAX_SIZE,
+    )
+
+    def validate(self, data):
+        if not data["add"] and not data["remove"]:
+            raise ValidationError("Передайте рецепты в add или remove")
+        if set(data["add"]) & set(data["remove"]):
+            raise ValidationError(
+                "Рецепт не может быть одновременно в add и remove")
+        return data
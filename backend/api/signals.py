@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import AuthToken
+from .authentication import invalidate_token
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=AuthToken)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.digest)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        return
+    for digest in AuthToken.objects.filter(user_id=instance.pk).values_list(
+            "digest", flat=True):
+        invalidate_token(digest)
@@ -0,0 +1,129 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """'60/min' -> (60, 60)."""
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Скользящее окно на двух счётчиках соседних фиксированных окон.
+
+    На ключ в кэше хранится не больше двух целых чисел, инкремент атомарен
+    (cache.add + cache.incr). Текущее значение оценивается как
+    prev * (доля прошлого окна внутри скользящего) + cur.
+    """
+
+    cache = cache
+    cache_format = "throttle:{scope}:{ident}:{window}"
+
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, request, view):
+        raise NotImplementedError(".get_scope() must be overridden")
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError(".get_ident_key() must be overridden")
+
+    def get_rate(self, scope):
+        rate = settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"].get(scope)
+        return parse_rate(rate) if rate else None
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = scope and self.get_rate(scope)
+        ident = rate and self.get_ident_key(request, view)
+        if not ident:
+            return True
+        num_requests, duration = rate
+        now = time.time()
+        window = int(now // duration)
+        current_key, previous_key = (
+            self.cache_format.format(scope=scope, ident=ident, window=number)
+            for number in (window, window - 1)
+        )
+        counts = self.cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+        elapsed = now - window * duration
+        weight = 1 - elapsed / duration
+        if previous * weight + current >= num_requests:
+            self._wait = self.compute_wait(
+                previous, current, elapsed, duration, num_requests)
+            return False
+        self.increment(current_key, duration)
+        return True
+
+    def increment(self, key, duration):
+        self.cache.add(key, 0, duration * 2)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, 1, duration * 2)
+
+    @staticmethod
+    def compute_wait(previous, current, elapsed, duration, num_requests):
+        if current < num_requests:
+            return max(
+                duration * (1 - (num_requests - current) / previous)
+                - elapsed,
+                0,
+            )
+        return duration - elapsed + duration * (1 - num_requests / current)
+
+    def wait(self):
+        return self._wait
+
+
+class ReadWriteScopeMixin:
+    scope_prefix = None
+
+    def get_scope(self, request, view):
+        kind = "read" if request.method in SAFE_METHODS else "write"
+        return f"{self.scope_prefix}_{kind}"
+
+
+class UserRateThrottle(ReadWriteScopeMixin, SlidingWindowThrottle):
+    """Лимит на пользователя, запись строже чтения."""
+
+    scope_prefix = "user"
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class IPRateThrottle(ReadWriteScopeMixin, SlidingWindowThrottle):
+    """Лимит на IP-адрес, запись строже чтения."""
+
+    scope_prefix = "ip"
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class ActionRateThrottle(SlidingWindowThrottle):
+    """Лимит на действие для пользователя (или IP).
+
+    Включается атрибутом throttle_scope у действия вьюсета.
+    """
+
+    def get_scope(self, request, view):
+        return getattr(view, "throttle_scope", None)
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user-{request.user.pk}"
+        else:
+            ident = f"ip-{self.get_ident(request)}"
+        return f"{getattr(view, 'action', None)}:{ident}"
@@ -1,8 +1,8 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
 from .views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
-                    TagViewSet)
+                    TagViewSet, TokenCreateView, TokenDestroyView)
 
 app_name = "api"
 
@@ -15,5 +15,7 @@ router.register("users", CustomUserViewSet)
 urlpatterns = [
     path("", include(router.urls)),
     path("", include("djoser.urls")),
-    path("auth/", include("djoser.urls.authtoken")),
+    re_path(r"^auth/token/login/?$", TokenCreateView.as_view(), name="login"),
+    re_path(
+        r"^auth/token/logout/?$", TokenDestroyView.as_view(), name="logout"),
 ]
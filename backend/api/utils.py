@@ -0,0 +1,28 @@
+from django.db import connections, router
+
+
+def insert_ignore(model, **values):
+    """Вставить строку одним запросом, если её ещё нет.
+
+    INSERT ... ON CONFLICT DO NOTHING RETURNING: True, если строка
+    вставлена, False, если уже существовала. Поддерживается PostgreSQL
+    и SQLite 3.35+.
+    """
+    connection = connections[router.db_for_write(model)]
+    meta = model._meta
+    quote = connection.ops.quote_name
+    fields = [meta.get_field(name) for name in values]
+    sql = "INSERT INTO {} ({}) VALUES ({}) ON CONFLICT DO NOTHING " \
+        "RETURNING {}".format(
+            quote(meta.db_table),
+            ", ".join(quote(field.column) for field in fields),
+            ", ".join(["%s"] * len(fields)),
+            quote(meta.pk.column),
+        )
+    params = [
+        field.get_db_prep_save(value, connection)
+        for field, value in zip(fields, values.values())
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone() is not None
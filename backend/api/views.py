@@ -1,26 +1,44 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Sum
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django_filters.rest_framework import DjangoFilterBackend
+from djoser import views as djoser_views
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from monitoring.metrics import SHOPPING_LIST_BYTES
 from recipes.models import (Favourite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
-from users.models import Subscribe
+                            RecipeSimilarity, ShoppingCart, Tag)
+from recipes.feeds import feed_page, subscription_changed
+from recipes.nutrition import cart_summary, cart_totals
+from recipes.registry import tag_registry
+from recipes.tasks import fan_out_recipe
+from recipes.units import display
+from tasks.queue import enqueue
+from users.avatars import replace_avatar, upload_limit
+from users.models import AuthToken, Subscribe
 from .filters import RecipeFilter
-from .pagination import CustomPagination
+from .pagination import (CustomPagination, EstimatedCountPagination,
+                         FeedCursorPagination)
+from .parsers import AvatarUploadParser
 from .permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
+from .readers import RecipeReader, parse_field_list, parse_limit
 from .serializers import (AvatarSerializer, CustomUserSerializer,
-                          IngredientSerializer, RecipePostSerializer,
-                          RecipeSerializer, RecipeShortSerializer,
-                          SubscribeSerializer, TagSerializer)
+                          IngredientSerializer, RecipeBatchSerializer,
+                          RecipePostSerializer, RecipeSerializer,
+                          RecipeShortSerializer, SubscribeSerializer,
+                          TagSerializer)
+from .utils import insert_ignore
 
 User = get_user_model()
 
@@ -33,16 +51,86 @@ class RecipeViewSet(ModelViewSet):
     ordering_fields = ["id"]
     ordering = ["-id"]
     pagination_class = CustomPagination
+    throttle_scope = None
+
+    def list(self, request, *args, **kwargs):
+        reader = RecipeReader.from_request(request)
+        queryset = reader.queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(reader.render(page))
+        return Response(reader.render(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        # Чтение разрешено всем, объектные права проверяются только
+        # для изменяющих методов.
+        reader = RecipeReader.from_request(request)
+        row = get_object_or_404(
+            reader.queryset(self.get_queryset()), pk=kwargs["pk"])
+        return Response(reader.render_one(row))
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
-        self.request.user.save()
+        recipe = serializer.save(author=self.request.user)
+        enqueue(fan_out_recipe, recipe.pk, recipe.author_id)
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeSerializer
         return RecipePostSerializer
 
+    @action(detail=False, methods=["get"],
+            permission_classes=[IsAuthenticated])
+    def feed(self, request):
+        """Рецепты авторов из подписок, новые сначала."""
+        paginator = FeedCursorPagination()
+        ids, has_more = feed_page(
+            request.user.pk,
+            paginator.get_cursor(request),
+            paginator.get_limit(request),
+        )
+        reader = RecipeReader.from_request(request)
+        return paginator.get_paginated_response(
+            request,
+            reader.render_ids(Recipe.objects.all(), ids),
+            ids[-1] if has_more else None,
+        )
+
+    @action(detail=True, methods=["get"])
+    def similar(self, request, pk=None):
+        """Похожие рецепты из предрассчитанной таблицы соседей."""
+        limit = parse_limit(
+            request, settings.RECOMMENDATIONS_TOP_K,
+            settings.RECOMMENDATIONS_TOP_K)
+        ids = list(
+            RecipeSimilarity.objects.filter(recipe_id=pk)
+            .order_by("-score").values_list("similar_id", flat=True)[:limit]
+        )
+        if not ids:
+            get_object_or_404(Recipe.objects.only("id"), id=pk)
+        reader = RecipeReader.from_request(request)
+        return Response(reader.render_ids(Recipe.objects.all(), ids))
+
+    @action(detail=False, methods=["get"],
+            permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        """Соседи последних избранных рецептов пользователя, кроме уже
+        добавленных в избранное."""
+        limit = parse_limit(
+            request, settings.RECOMMENDATIONS_TOP_K,
+            settings.RECOMMENDATIONS_TOP_K)
+        history = Favourite.objects.filter(user=request.user).order_by(
+            "-id").values("recipe_id")[:settings.RECOMMENDATIONS_HISTORY]
+        ids = list(
+            RecipeSimilarity.objects.filter(recipe_id__in=history)
+            .exclude(similar_id__in=Favourite.objects.filter(
+                user=request.user).values("recipe_id"))
+            .values("similar_id").annotate(total=Sum("score"))
+            .order_by("-total", "similar_id")
+            .values_list("similar_id", flat=True)[:limit]
+        )
+        reader = RecipeReader.from_request(request)
+        return Response(reader.render_ids(Recipe.objects.all(), ids))
+
     @action(detail=True, methods=["get"],
             url_path="get-link", url_name="get-link")
     def get_link(self, request, pk=None):
@@ -59,32 +147,78 @@ class RecipeViewSet(ModelViewSet):
         self, request, pk, model, error_message_added, error_message_removed
     ):
         if request.method == "POST":
-            if model.objects.filter(user=request.user, recipe__id=pk).exists():
+            recipe = get_object_or_404(
+                Recipe.objects.only("id", "name", "image", "cooking_time"),
+                id=pk,
+            )
+            if not insert_ignore(
+                    model, user_id=request.user.pk, recipe_id=recipe.pk):
                 return Response(
                     {"errors": error_message_added},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            recipe = get_object_or_404(Recipe, id=pk)
-            model.objects.create(user=request.user, recipe=recipe)
             serializer = RecipeShortSerializer(recipe)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        obj = model.objects.filter(user=request.user, recipe__id=pk)
-        if obj.exists():
-            obj.delete()
+        deleted, _ = model.objects.filter(
+            user=request.user, recipe_id=pk).delete()
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
-
+        get_object_or_404(Recipe.objects.only("id"), id=pk)
         return Response(
             {"errors": error_message_removed},
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    def handle_batch(self, request, model):
+        """Добавить и удалить пачку рецептов за фиксированное число запросов.
+
+        Один запрос проверяет все id и наличие связи, затем одна массовая
+        вставка и одно массовое удаление.
+        """
+        serializer = RecipeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add = list(dict.fromkeys(serializer.validated_data["add"]))
+        remove = list(dict.fromkeys(serializer.validated_data["remove"]))
+        linked = dict(
+            Recipe.objects.filter(id__in=add + remove)
+            .annotate(linked=Exists(model.objects.filter(
+                user=request.user, recipe=OuterRef("pk"))))
+            .values_list("id", "linked")
+        )
+        to_add = [pk for pk in add if linked.get(pk) is False]
+        to_remove = [pk for pk in remove if linked.get(pk)]
+        with transaction.atomic():
+            if to_add:
+                model.objects.bulk_create(
+                    [model(user=request.user, recipe_id=pk) for pk in to_add],
+                    ignore_conflicts=True,
+                )
+            if to_remove:
+                model.objects.filter(
+                    user=request.user, recipe_id__in=to_remove).delete()
+        results = [
+            {"id": pk, "status": (
+                "not_found" if pk not in linked
+                else "already_added" if linked[pk] else "added"
+            )}
+            for pk in add
+        ] + [
+            {"id": pk, "status": (
+                "not_found" if pk not in linked
+                else "removed" if linked[pk] else "not_added"
+            )}
+            for pk in remove
+        ]
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
     @action(
         detail=True,
         methods=["post", "delete"],
         url_path="favorite",
         url_name="favorite",
         permission_classes=[IsAuthenticated],
+        throttle_scope="toggle",
     )
     def favorite(self, request, pk):
         return self.handle_favorite_or_shopping_cart(
@@ -98,6 +232,7 @@ class RecipeViewSet(ModelViewSet):
         url_path="shopping_cart",
         url_name="shopping_cart",
         permission_classes=[IsAuthenticated],
+        throttle_scope="toggle",
     )
     def shopping_cart(self, request, pk):
         return self.handle_favorite_or_shopping_cart(
@@ -108,6 +243,39 @@ class RecipeViewSet(ModelViewSet):
             "Рецепт уже был удален",
         )
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="favorite/batch",
+        url_name="favorite-batch",
+        permission_classes=[IsAuthenticated],
+        throttle_scope="toggle",
+    )
+    def favorite_batch(self, request):
+        return self.handle_batch(request, Favourite)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="shopping_cart/batch",
+        url_name="shopping_cart-batch",
+        permission_classes=[IsAuthenticated],
+        throttle_scope="toggle",
+    )
+    def shopping_cart_batch(self, request):
+        return self.handle_batch(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=["delete"],
+        url_path="shopping_cart",
+        url_name="shopping_cart-clear",
+        permission_classes=[IsAuthenticated],
+    )
+    def clear_shopping_cart(self, request):
+        ShoppingCart.objects.filter(user=request.user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=False, methods=["get"],
             permission_classes=[IsAuthenticated])
     def download_shopping_cart(self, request):
@@ -120,21 +288,20 @@ class RecipeViewSet(ModelViewSet):
         ingredients = (
             IngredientRecipe.objects.filter(
                 recipe__shopping_cart__user=request.user)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total_amount=Sum("amount"))
+            .values_list("ingredient__name", "base_unit")
+            .annotate(total_amount=Sum("base_amount"))
+            .order_by("ingredient__name", "base_unit")
         )
         shopping_list = "Список покупок \n"
         shopping_items = []
-        for ingredient in ingredients:
-            item = (
-                f'- {ingredient["ingredient__name"]} '
-                f'({ingredient["ingredient__measurement_unit"]})'
-                f' - {ingredient["total_amount"]}'
-            )
-            shopping_items.append(item)
+        for name, base_unit, total_amount in ingredients:
+            amount, unit = display(base_unit, total_amount)
+            shopping_items.append(f"- {name} ({unit}) - {amount}")
 
         shopping_list += "\n".join(shopping_items)
+        shopping_list += cart_summary(cart_totals(user))
         response = HttpResponse(shopping_list, content_type="text/plain")
+        SHOPPING_LIST_BYTES.observe(len(response.content))
         filename = f"{user.username}_shopping_list.txt"
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
 
@@ -160,6 +327,9 @@ class TagViewSet(ModelViewSet):
     http_method_names = ["get"]
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(tag_registry.list())
+
 
 def redirect_short_link(request, short_link):
     full_short_link = f"{request.get_host()}/s/{short_link}"
@@ -171,6 +341,65 @@ def redirect_short_link(request, short_link):
 class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
+    pagination_class = EstimatedCountPagination
+    throttle_scope = None
+    sparse_actions = ("list", "retrieve", "me", "subscriptions")
+    expandable = ("recipes",)
+
+    def get_expanded(self):
+        """Связи, выводимые вложенными.
+
+        Без ?expand= - те, что уже есть в ответе действия: рецепты только
+        в подписках. ?expand=recipes добавляет recipes и recipes_count к
+        остальным ответам, а в подписках без него рецепты отдаются id.
+        """
+        if self.action not in self.sparse_actions:
+            return None
+        expand = parse_field_list(self.request, "expand", self.expandable)
+        if expand is None:
+            return self.expandable if self.action == "subscriptions" else ()
+        return expand
+
+    def with_recipes(self):
+        return self.action == "subscriptions" or (
+            self.request.method in SAFE_METHODS
+            and "recipes" in (self.get_expanded() or ())
+        )
+
+    def get_serializer_class(self):
+        if self.with_recipes():
+            return SubscribeSerializer
+        return super().get_serializer_class()
+
+    def get_requested_fields(self):
+        if self.action not in self.sparse_actions:
+            return None
+        serializer_class = (
+            SubscribeSerializer if self.with_recipes()
+            else CustomUserSerializer
+        )
+        return parse_field_list(
+            self.request, "fields", serializer_class.Meta.fields)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_requested_fields()
+        context["expand"] = self.get_expanded()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.sparse_actions:
+            return queryset
+        fields = self.get_requested_fields() or SubscribeSerializer.Meta.fields
+        queryset = queryset.only(*CustomUserSerializer.get_columns(fields))
+        user = self.request.user
+        if "is_subscribed" in fields and user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Subscribe.objects.filter(
+                    user_id=user.pk, author_id=OuterRef("pk"))
+            ))
+        return queryset
 
     @action(
         detail=True,
@@ -178,19 +407,38 @@ class CustomUserViewSet(UserViewSet):
         url_path="subscribe",
         url_name="subscribe",
         permission_classes=[IsAuthenticated],
+        throttle_scope="toggle",
     )
     def subscribe(self, request, **kwargs):
         author_id = self.kwargs.get("id")
-        author = get_object_or_404(User, id=author_id)
 
         if request.method == "POST":
-            Subscribe.objects.create(user=request.user, author_id=author_id)
-            serializer = SubscribeSerializer(author)
+            author = get_object_or_404(User, id=author_id)
+            if author.pk == request.user.pk:
+                return Response(
+                    {"errors": "Нельзя подписаться на самого себя"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if not insert_ignore(
+                    Subscribe, user_id=request.user.pk, author_id=author.pk):
+                return Response(
+                    {"errors": "Вы уже подписаны на этого автора"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            subscription_changed(request.user.pk, author.pk)
+            serializer = SubscribeSerializer(
+                author, context={"request": request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        subscription = get_object_or_404(
-            Subscribe, user=request.user, author=author)
-        subscription.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        deleted, _ = Subscribe.objects.filter(
+            user=request.user, author_id=author_id).delete()
+        if deleted:
+            subscription_changed(request.user.pk, int(author_id))
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(User.objects.only("id"), id=author_id)
+        return Response(
+            {"errors": "Вы не подписаны на этого автора"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     @action(
         detail=False,
@@ -199,28 +447,53 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = User.objects.filter(subscriptions_sent__user=user)
+        queryset = self.get_queryset().filter(subscriptions_sent__user=user)
         pages = self.paginate_queryset(queryset)
         serializer = SubscribeSerializer(
-            pages, many=True, context={"request": request})
+            pages, many=True, context=self.get_serializer_context())
         return self.get_paginated_response(serializer.data)
 
     @action(
         detail=False,
         methods=["put", "delete"],
         permission_classes=[IsAuthenticated],
+        parser_classes=[JSONParser, MultiPartParser, AvatarUploadParser],
         url_path="me/avatar",
     )
     def avatar(self, request):
         user = request.user
 
         if request.method == "PUT":
+            # Тело больше допустимого отклоняется до его чтения и разбора.
+            if int(request.META.get("CONTENT_LENGTH") or 0) > upload_limit():
+                return Response(
+                    {"avatar": ["Слишком большой файл."]},
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
             serializer = AvatarSerializer(
-                data=request.data, context={"request": request}
+                user, data=request.data, context={"request": request}
             )
             serializer.is_valid(raise_exception=True)
-            serializer.update(user, serializer.validated_data)
+            serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
-        user.avatar.delete()
-        user.save()
+        replace_avatar(user, None)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TokenCreateView(djoser_views.TokenCreateView):
+
+    def _action(self, serializer):
+        user = serializer.user
+        _, key = AuthToken.objects.create_token(user)
+        user_logged_in.send(
+            sender=user.__class__, request=self.request, user=user)
+        return Response({"auth_token": key}, status=status.HTTP_200_OK)
+
+
+class TokenDestroyView(djoser_views.TokenDestroyView):
+
+    def post(self, request):
+        AuthToken.objects.revoke(request.auth)
+        user_logged_out.send(
+            sender=request.user.__class__, request=request, user=request.user)
         return Response(status=status.HTTP_204_NO_CONTENT)
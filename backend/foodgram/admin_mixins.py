@@ -0,0 +1,35 @@
+from django.db.models import Q
+
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdminMixin:
+    """Админка для больших таблиц.
+
+    Число строк оценивается без COUNT(*), а поиск идёт точным
+    совпадением по индексированным колонкам из exact_search_fields
+    (поле -> преобразование строки запроса), а не ILIKE по всей таблице.
+    Поле может включать lookup, который использует индекс, например
+    name__startswith с индексом varchar_pattern_ops.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    exact_search_fields = {}
+
+    def get_search_fields(self, request):
+        return tuple(self.exact_search_fields)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q()
+        for field, convert in self.exact_search_fields.items():
+            try:
+                condition |= Q(**{field: convert(term)})
+            except ValueError:
+                continue
+        if not condition:
+            return queryset.none(), False
+        return queryset.filter(condition), False
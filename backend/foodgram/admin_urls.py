@@ -0,0 +1,11 @@
+"""URL админки.
+
+Модуль подключается строкой, поэтому импортируется лениво — при первом
+запросе к /admin/ или при reverse("admin:..."); тогда же загружаются
+модули admin.py всех приложений.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
@@ -0,0 +1,23 @@
+from importlib import import_module
+
+from django.contrib.admin.apps import SimpleAdminConfig
+from django.contrib.admin.checks import check_admin_app, check_dependencies
+from django.core import checks
+
+
+def check_admin(app_configs, **kwargs):
+    import_module("foodgram.admin_urls")
+    return check_admin_app(app_configs, **kwargs)
+
+
+class AdminConfig(SimpleAdminConfig):
+    """Админка без автообнаружения при старте процесса.
+
+    Модули admin.py загружаются при первом запросе к /admin/ (см.
+    foodgram/admin_urls.py), а для проверок manage.py check — перед
+    проверкой зарегистрированных моделей.
+    """
+
+    def ready(self):
+        checks.register(check_dependencies, checks.Tags.admin)
+        checks.register(check_admin, checks.Tags.admin)
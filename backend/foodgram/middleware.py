@@ -0,0 +1,59 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import pin_to_primary, pin_to_replica, unpin
+
+
+def _sticky_cache_key(request):
+    auth = request.META.get("HTTP_AUTHORIZATION")
+    if not auth:
+        return None
+    digest = hashlib.sha256(auth.encode()).hexdigest()
+    return f"primary-pin:{digest}"
+
+
+class ReplicaStickinessMiddleware:
+    """Read-your-writes для чтения с реплик.
+
+    Все чтения запроса идут в одну базу, небезопасные запросы - в основную
+    БД. После успешной записи клиент ещё PRIMARY_STICKY_SECONDS читает из
+    основной БД: браузер помечается cookie, а клиенты с токеном - меткой
+    в кэше.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        is_write = request.method not in SAFE_METHODS
+        cache_key = _sticky_cache_key(request)
+        pinned = (
+            is_write
+            or settings.PRIMARY_STICKY_COOKIE in request.COOKIES
+            or (cache_key is not None and cache.get(cache_key))
+        )
+        token = pin_to_primary() if pinned else pin_to_replica()
+        try:
+            response = self.get_response(request)
+        finally:
+            unpin(token)
+        if is_write and response.status_code < 400:
+            self.stick(response, cache_key)
+        return response
+
+    def stick(self, response, cache_key):
+        timeout = settings.PRIMARY_STICKY_SECONDS
+        response.set_cookie(
+            settings.PRIMARY_STICKY_COOKIE,
+            "1",
+            max_age=timeout,
+            httponly=True,
+            samesite="Lax",
+        )
+        if cache_key is not None:
+            cache.set(cache_key, True, timeout)
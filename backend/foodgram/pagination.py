@@ -0,0 +1,42 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 10000
+
+
+def estimated_count(queryset):
+    """Оценка числа строк таблицы из статистики PostgreSQL или None.
+
+    Годится только для запроса без условий: фильтры статистика не учитывает.
+    """
+    query = queryset.query
+    if query.where or query.distinct or query.combinator:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < ESTIMATE_THRESHOLD:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator без COUNT(*) по большой таблице целиком.
+
+    На небольших таблицах и при фильтрах число строк считается точно.
+    """
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, "query"):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None:
+                return estimate
+        return super().count
@@ -0,0 +1,57 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY_DB = "default"
+
+# База для чтения в текущем запросе или задаче: выбирается один раз,
+# чтобы все чтения запроса видели реплику в одной точке отставания.
+_read_db = ContextVar("read_db", default=None)
+
+
+def pin_to_primary():
+    """Направить все чтения текущего запроса в основную БД."""
+    return _read_db.set(PRIMARY_DB)
+
+
+def pin_to_replica():
+    """Направить все чтения текущего запроса в одну случайную реплику."""
+    replicas = settings.DATABASE_REPLICAS
+    return _read_db.set(random.choice(replicas) if replicas else PRIMARY_DB)
+
+
+def unpin(token):
+    _read_db.reset(token)
+
+
+class ReplicaRouter:
+    """Роутер: чтение с реплик, запись и блокировки в основную БД.
+
+    Вне запроса и задачи (команды, shell) реплика выбирается на каждый
+    запрос к БД.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return PRIMARY_DB
+        pinned = _read_db.get()
+        if pinned is not None:
+            return pinned
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DB, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DB
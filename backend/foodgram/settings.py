@@ -13,24 +13,27 @@ DEBUG = os.getenv("DEBUG", "False") == "True"
 ALLOWED_HOSTS = [os.getenv(key="ALLOWED_HOSTS")]
 
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    "foodgram.apps.AdminConfig",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "rest_framework",
-    "rest_framework.authtoken",
     "djoser",
     "django_filters",
     "recipes",
     "api",
     "users",
+    "tasks",
+    "monitoring",
 ]
 
 MIDDLEWARE = [
+    "monitoring.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "foodgram.middleware.ReplicaStickinessMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -70,6 +73,42 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: DB_REPLICA_HOSTS=replica1,replica2
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    alias = f"replica{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# Кэш должен быть общим для всех процессов: в нём токены, счётчики
+# ограничения запросов, версия тегов и ленты, которые пишет воркер задач.
+# LocMemCache годится только для одного процесса (см. api/checks.py и
+# tasks/checks.py).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Число воркеров gunicorn, та же переменная окружения, что в
+# gunicorn.conf.py.
+WEB_WORKERS = int(os.getenv("GUNICORN_WORKERS", 1))
+
+DATABASE_ROUTERS = ["foodgram.routers.ReplicaRouter"]
+
+PRIMARY_STICKY_SECONDS = int(os.getenv("PRIMARY_STICKY_SECONDS", 10))
+
+PRIMARY_STICKY_COOKIE = "use_primary_db"
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -107,13 +146,31 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 6,
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 1)),
+    "DEFAULT_THROTTLE_CLASSES": [
+        "api.throttling.UserRateThrottle",
+        "api.throttling.IPRateThrottle",
+        "api.throttling.ActionRateThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "user_read": os.getenv("THROTTLE_USER_READ", "600/min"),
+        "user_write": os.getenv("THROTTLE_USER_WRITE", "60/min"),
+        "ip_read": os.getenv("THROTTLE_IP_READ", "1200/min"),
+        "ip_write": os.getenv("THROTTLE_IP_WRITE", "120/min"),
+        "toggle": os.getenv("THROTTLE_TOGGLE", "30/min"),
+    },
 }
 
 DJOSER = {
+    "TOKEN_MODEL": "users.models.AuthToken",
     "SERIALIZERS": {
         "user_create": "api.serializers.CustomUserCreateSerializer",
         "user": "api.serializers.CustomUserSerializer",
@@ -126,6 +183,83 @@ DJOSER = {
     "HIDE_USERS": False,
 }
 
+AUTH_TOKEN_TTL = 60 * 60 * 24 * 30
+
+TOKEN_CACHE_TTL = 300
+
+TOKEN_CACHE_LOCAL_TTL = 5
+
+TOKEN_CACHE_LOCAL_SIZE = 4096
+
+RECIPE_BATCH_MAX_SIZE = 500
+
+# Без общего кэша (CACHE_BACKEND не задан) задачи выполняются в том же
+# процессе: записи воркера run_tasks в LocMemCache не видны веб-процессу
+# (см. tasks/checks.py).
+TASKS_BACKEND = os.getenv(
+    "TASKS_BACKEND",
+    "tasks.backends.DatabaseBackend" if os.getenv("CACHE_BACKEND")
+    else "tasks.backends.LocalQueueBackend",
+)
+
+TASKS_MAX_ATTEMPTS = 5
+
+TASKS_RETRY_DELAY = 10
+
+TASKS_LEASE_SECONDS = 300
+
+FEED_MAX_LENGTH = 500
+
+FEED_CACHE_TTL = 60 * 60 * 24 * 7
+
+FEED_LOCK_TTL = 5
+
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", 5000))
+
+FEED_FOLLOWER_COUNT_TTL = 300
+
+FEED_FANOUT_BATCH = 1000
+
+RECOMMENDATIONS_TOP_K = 20
+
+RECOMMENDATIONS_FAVOURITE_WEIGHT = 0.7
+
+RECOMMENDATIONS_HISTORY = 50
+
+RECOMMENDATIONS_P99_TARGET_MS = 25
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", 1))
+
+SLOW_REQUEST_PROFILER = os.getenv("SLOW_REQUEST_PROFILER", "")
+
+SLOW_REQUEST_PROFILE_RATE = float(os.getenv("SLOW_REQUEST_PROFILE_RATE", 0.01))
+
+SLOW_REQUEST_HANDLER = "monitoring.profiling.log_slow_request"
+
+# Порог, после которого SamplingProfiler начинает снимать стеки любого
+# запроса; 0 - только отобранные запросы.
+SLOW_REQUEST_PROFILE_THRESHOLD = float(
+    os.getenv("SLOW_REQUEST_PROFILE_THRESHOLD", 0.5))
+
+SLOW_REQUEST_PROFILE_INTERVAL = 0.005
+
+SLOW_REQUEST_PROFILE_HEADER_MAX_AGE = 60 * 60
+
+SLOW_REQUEST_PROFILE_DIR = os.getenv(
+    "SLOW_REQUEST_PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+
+SLOW_REQUEST_PROFILE_BUFFER_SIZE = 200
+
+AVATAR_MAX_BYTES = 2 * 1024 * 1024
+
+AVATAR_MAX_PIXELS = 4096 * 4096
+
+# Размеры аватара по большей стороне, от большего к меньшему. Первый
+# хранится в User.avatar, остальные - рядом, с суффиксом _<размер>.
+AVATAR_SIZES = (256, 128, 64)
+
 USERNAME_LENGTH = 150
 
 EMAIL_LENGTH = 254
@@ -1,9 +1,9 @@
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib import admin
 from django.urls import include, path
 
 from api.views import redirect_short_link
+from monitoring.views import metrics_view
 
 urlpatterns = [
     path(
@@ -11,8 +11,9 @@ urlpatterns = [
         redirect_short_link,
         name="short_link_redirect",
     ),
-    path("admin/", admin.site.urls),
+    path("admin/", ("foodgram.admin_urls", "admin", "admin")),
     path("api/", include("api.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 if settings.DEBUG:
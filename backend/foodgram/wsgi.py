@@ -1,7 +1,14 @@
 import os
+from importlib import import_module
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram.settings")
 
 application = get_wsgi_application()
+
+# URLconf с представлениями и сериализаторами загружается сразу, а не на
+# первом запросе: при preload_app это происходит один раз в мастере, и
+# воркеры получают уже импортированные модули.
+import_module(settings.ROOT_URLCONF)
@@ -0,0 +1,40 @@
+import gc
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+bind = os.getenv("GUNICORN_BIND", "0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 1))
+reload = os.getenv("GUNICORN_RELOAD", "False") == "True"
+# Приложение импортируется один раз в мастере, воркеры получают его
+# копией страниц памяти при fork. С перезагрузкой кода несовместимо.
+preload_app = (
+    not reload and os.getenv("GUNICORN_PRELOAD", "True") == "True")
+
+# Каталог метрик очищается при чтении конфигурации, а не в on_starting:
+# с preload_app приложение и файлы его метрик создаются раньше этого хука.
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from django.core.cache import caches
+    from django.db import connections
+
+    # Соединения мастера не должны достаться воркерам: общий сокет
+    # после fork ломает протокол у всех процессов сразу.
+    connections.close_all()
+    for cache in caches.all():
+        cache.close()
+    # Объекты, созданные при импорте, исключаются из сборки мусора,
+    # чтобы её обходы не трогали общие страницы и не копировали их.
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
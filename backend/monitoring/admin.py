@@ -0,0 +1,94 @@
+from django.contrib import admin
+from django.http import Http404, HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from . import profiles
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Просмотр кольцевого буфера профилей вместо списка из БД."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<str:name>/folded/",
+                self.admin_site.admin_view(self.folded_view),
+                name="monitoring_requestprofile_folded",
+            ),
+            path(
+                "<str:name>/",
+                self.admin_site.admin_view(self.detail_view),
+                name="monitoring_requestprofile_detail",
+            ),
+            path(
+                "",
+                self.admin_site.admin_view(self.changelist_view),
+                name="monitoring_requestprofile_changelist",
+            ),
+        ]
+
+    def get_profile(self, request, name):
+        if not self.has_view_permission(request):
+            raise Http404
+        dump = profiles.load(name)
+        if dump is None:
+            raise Http404
+        return dump
+
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_view_permission(request):
+            raise Http404
+        items = []
+        for name in profiles.names():
+            dump = profiles.load(name)
+            if dump is not None:
+                dump["name"] = name
+                dump["samples"] = sum(dump["stacks"].values())
+                dump["query_count"] = len(dump["queries"])
+                items.append(dump)
+        return TemplateResponse(
+            request,
+            "admin/monitoring/requestprofile_list.html",
+            {
+                **self.admin_site.each_context(request),
+                "opts": self.model._meta,
+                "title": self.model._meta.verbose_name_plural,
+                "profiles": items,
+            },
+        )
+
+    def detail_view(self, request, name):
+        dump = self.get_profile(request, name)
+        return TemplateResponse(
+            request,
+            "admin/monitoring/requestprofile_detail.html",
+            {
+                **self.admin_site.each_context(request),
+                "opts": self.model._meta,
+                "title": f"{dump['method']} {dump['path']}",
+                "name": name,
+                "profile": dump,
+                "folded": profiles.folded(dump),
+                "sql_ms": round(sum(ms for _, ms in dump["queries"]), 3),
+            },
+        )
+
+    def folded_view(self, request, name):
+        dump = self.get_profile(request, name)
+        response = HttpResponse(
+            profiles.folded(dump), content_type="text/plain; charset=utf-8")
+        response["Content-Disposition"] = (
+            f'attachment; filename="{name.split(".")[0]}.folded"')
+        return response
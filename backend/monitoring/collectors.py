@@ -0,0 +1,22 @@
+from prometheus_client.core import GaugeMetricFamily
+
+from tasks import metrics as task_metrics
+
+
+class TaskQueueCollector:
+    """Глубина очереди задач и исходы за минуту, считаются при опросе."""
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            "foodgram_task_queue_depth", "Задачи в очереди",
+            labels=["state"])
+        for state, value in task_metrics.queue_depth().items():
+            depth.add_metric([state], value)
+        yield depth
+        processed = GaugeMetricFamily(
+            "foodgram_tasks_processed_last_minute",
+            "Задачи по исходам за последнюю минуту",
+            labels=["outcome"])
+        for outcome, value in task_metrics.throughput(1).items():
+            processed.add_metric([outcome], value)
+        yield processed
@@ -0,0 +1,129 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# ru_maxrss наследуется через fork и exec от manage.py, поэтому память
+# берётся из /proc: текущий RSS процесса-зонда.
+PROBE = """
+import json, resource, sys, time
+def rss_kb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+baseline = rss_kb()
+started = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - started
+from django.db import connections
+print(json.dumps({{
+    "wall_ms": elapsed * 1000,
+    "baseline_kb": baseline,
+    "rss_kb": rss_kb(),
+    "modules": len(sys.modules),
+    "db": [c.alias for c in connections.all() if c.connection is not None],
+}}))
+"""
+
+
+def parse_importtime(output):
+    """Строки -X importtime: {модуль: (собственное, суммарное время, мкс)}."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Холодный старт воркера: время импорта по модулям и пакетам, "
+        "память процесса, обращения к БД при импорте."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="foodgram.wsgi")
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--json", dest="json_path", help="Сохранить результаты в JSON")
+
+    def probe(self, module):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c",
+             PROBE.format(module=module)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return json.loads(result.stdout), parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        runs = [self.probe(options["module"]) for _ in range(options["runs"])]
+        # Минимум по прогонам: шум от диска и планировщика только добавляет.
+        modules = {}
+        for _, timings in runs:
+            for name, (own, cumulative) in timings.items():
+                best = modules.get(name, (own, cumulative))
+                modules[name] = (min(best[0], own), min(best[1], cumulative))
+        packages = defaultdict(int)
+        for name, (own, _) in modules.items():
+            packages[name.split(".")[0]] += own
+        summary = min((stats for stats, _ in runs), key=lambda s: s["wall_ms"])
+        top = options["top"]
+        results = {
+            "module": options["module"],
+            "wall_ms": round(summary["wall_ms"], 1),
+            "import_ms": round(
+                sum(own for own, _ in modules.values()) / 1000, 1),
+            "modules": summary["modules"],
+            "baseline_rss_mb": round(summary["baseline_kb"] / 1024, 1),
+            "rss_mb": round(summary["rss_kb"] / 1024, 1),
+            "db_connections": summary["db"],
+            "packages": [
+                {"package": name, "ms": round(own / 1000, 1)}
+                for name, own in sorted(
+                    packages.items(), key=lambda item: -item[1])[:top]
+            ],
+            "cumulative": [
+                {"module": name, "ms": round(cumulative / 1000, 1),
+                 "self_ms": round(own / 1000, 1)}
+                for name, (own, cumulative) in sorted(
+                    modules.items(), key=lambda item: -item[1][1])[:top]
+            ],
+        }
+
+        self.stdout.write(
+            f"{results['module']}: {results['wall_ms']} мс, "
+            f"{results['modules']} модулей, "
+            f"RSS {results['baseline_rss_mb']} -> {results['rss_mb']} МБ")
+        self.stdout.write("Пакеты (собственное время импорта):")
+        for row in results["packages"]:
+            self.stdout.write(f"  {row['ms']:>8} мс  {row['package']}")
+        self.stdout.write("Модули (с учётом вложенных импортов):")
+        for row in results["cumulative"]:
+            self.stdout.write(
+                f"  {row['ms']:>8} мс  {row['self_ms']:>7} мс  "
+                f"{row['module']}")
+        if options["json_path"]:
+            with open(options["json_path"], "w") as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+        if results["db_connections"]:
+            raise CommandError(
+                "Импорт открыл соединения с БД "
+                f"{', '.join(results['db_connections'])}: с preload_app "
+                "их унаследуют воркеры")
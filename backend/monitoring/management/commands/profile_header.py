@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from monitoring.profiling import profile_header_value
+
+
+class Command(BaseCommand):
+    help = "Выпустить значение заголовка X-Profile для профилирования."
+
+    def handle(self, *args, **options):
+        self.stdout.write(profile_header_value())
+        self.stderr.write(
+            "Действует "
+            f"{settings.SLOW_REQUEST_PROFILE_HEADER_MAX_AGE} с, "
+            "нужен SLOW_REQUEST_PROFILER")
@@ -0,0 +1,64 @@
+"""Метрики приложения в формате Prometheus.
+
+Под gunicorn значения агрегируются между воркерами через файлы в
+PROMETHEUS_MULTIPROC_DIR (multiprocess-режим prometheus_client), поэтому
+здесь только счётчики и гистограммы: gauge в этом режиме требуют
+отдельной стратегии агрегации.
+"""
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram
+
+REQUEST_DURATION = Histogram(
+    "foodgram_http_request_duration_seconds",
+    "Время обработки запроса",
+    ["view", "action", "method", "status"],
+)
+DB_QUERIES = Histogram(
+    "foodgram_db_queries_per_request",
+    "Число SQL-запросов на HTTP-запрос",
+    ["view", "action"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+DB_QUERY_DURATION = Histogram(
+    "foodgram_db_query_duration_seconds",
+    "Время выполнения SQL-запроса",
+    ["database"],
+    buckets=(
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1,
+        2.5, float("inf"),
+    ),
+)
+CACHE_REQUESTS = Counter(
+    "foodgram_cache_requests_total",
+    "Обращения к кэшам приложения",
+    ["cache", "result"],
+)
+IMAGE_DECODE_DURATION = Histogram(
+    "foodgram_image_decode_seconds",
+    "Декодирование и проверка изображения из base64",
+)
+SHOPPING_LIST_BYTES = Histogram(
+    "foodgram_shopping_list_bytes",
+    "Размер выгруженного списка покупок",
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, float("inf")),
+)
+SLOW_REQUESTS = Counter(
+    "foodgram_slow_requests_total",
+    "Запросы дольше SLOW_REQUEST_SECONDS",
+    ["view", "action"],
+)
+
+
+def cache_lookup(name, hit):
+    CACHE_REQUESTS.labels(name, "hit" if hit else "miss").inc()
+
+
+@contextmanager
+def timed(histogram):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started)
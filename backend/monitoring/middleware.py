@@ -0,0 +1,81 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+from .profiling import get_profiler, report_slow_request
+
+
+class QueryCounter:
+    """execute_wrapper: число и время SQL-запросов запроса, запросы
+    передаются профилировщику."""
+
+    def __init__(self, profiler=None):
+        self.count = 0
+        self.profiler = profiler
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            metrics.DB_QUERY_DURATION.labels(
+                context["connection"].alias).observe(duration)
+            if self.profiler is not None:
+                self.profiler.query(sql, duration)
+
+
+def view_labels(request):
+    """(view, action) для меток: имя вьюсета и его действие."""
+    view = getattr(request, "metrics_view", None)
+    if view is None:
+        return "unresolved", ""
+    cls = getattr(view, "cls", None)
+    if cls is None:
+        return f"{view.__module__}.{view.__name__}", ""
+    actions = getattr(view, "actions", None) or {}
+    return cls.__name__, actions.get(
+        request.method.lower(), request.method.lower())
+
+
+class MetricsMiddleware:
+    """Гистограммы времени и числа SQL-запросов по вьюсетам и действиям,
+    профилирование запросов (см. profiling.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiler = get_profiler(request)
+        counter = QueryCounter(profiler)
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+        duration = time.perf_counter() - started
+        profile = (
+            profiler.report(request, response, duration)
+            if profiler is not None else None)
+        view, action = view_labels(request)
+        metrics.REQUEST_DURATION.labels(
+            view, action, request.method, response.status_code
+        ).observe(duration)
+        metrics.DB_QUERIES.labels(view, action).observe(counter.count)
+        if duration >= settings.SLOW_REQUEST_SECONDS:
+            metrics.SLOW_REQUESTS.labels(view, action).inc()
+            report_slow_request(request, duration, profile)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_func
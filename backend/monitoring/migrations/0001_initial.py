@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="RequestProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Профиль запроса",
+                "verbose_name_plural": "Профили запросов",
+                "managed": False,
+                "default_permissions": ("view",),
+            },
+        ),
+    ]
@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """Профиль запроса. Таблицы нет: профили лежат в файлах
+    SLOW_REQUEST_PROFILE_DIR, модель нужна только для раздела админки."""
+
+    class Meta:
+        managed = False
+        default_permissions = ("view",)
+        verbose_name = "Профиль запроса"
+        verbose_name_plural = "Профили запросов"
@@ -0,0 +1,66 @@
+"""Кольцевой буфер профилей запросов на диске.
+
+Каждый профиль - отдельный gzip-JSON в SLOW_REQUEST_PROFILE_DIR; после записи
+самые старые файлы сверх SLOW_REQUEST_PROFILE_BUFFER_SIZE удаляются.
+"""
+import gzip
+import json
+import os
+import re
+import time
+
+from django.conf import settings
+
+NAME_RE = re.compile(r"^\d+-\d+\.json\.gz$")
+
+
+def save(dump):
+    directory = settings.SLOW_REQUEST_PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.time_ns()}-{os.getpid()}.json.gz"
+    temporary = os.path.join(directory, f".{name}.tmp")
+    with gzip.open(temporary, "wt", encoding="utf-8") as file:
+        json.dump(dump, file, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporary, os.path.join(directory, name))
+    prune()
+    return name
+
+
+def names():
+    """Имена профилей, новые сначала."""
+    try:
+        files = os.listdir(settings.SLOW_REQUEST_PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (name for name in files if NAME_RE.match(name)),
+        key=lambda name: int(name.split("-")[0]),
+        reverse=True,
+    )
+
+
+def prune():
+    for name in names()[settings.SLOW_REQUEST_PROFILE_BUFFER_SIZE:]:
+        try:
+            os.remove(os.path.join(settings.SLOW_REQUEST_PROFILE_DIR, name))
+        except FileNotFoundError:
+            pass
+
+
+def load(name):
+    """Профиль по имени файла или None."""
+    if not NAME_RE.match(name):
+        return None
+    try:
+        with gzip.open(
+                os.path.join(settings.SLOW_REQUEST_PROFILE_DIR, name),
+                "rt", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def folded(dump):
+    """Стеки в формате stackcollapse: «кадр;кадр;кадр число»."""
+    return "".join(
+        f"{stack} {count}\n" for stack, count in dump["stacks"].items())
@@ -0,0 +1,115 @@
+"""Подключаемое профилирование запросов.
+
+MetricsMiddleware создаёт для запроса профилировщик SLOW_REQUEST_PROFILER.
+Профилируются доля SLOW_REQUEST_PROFILE_RATE запросов и запросы с
+подписанным заголовком X-Profile (manage.py profile_header). Если запрос
+оказался дольше SLOW_REQUEST_SECONDS, отчёт профилировщика передаётся
+обработчику SLOW_REQUEST_HANDLER.
+
+Профилировщик - подкласс Profiler: start() и stop() вокруг запроса,
+query() для каждого SQL-запроса (из счётчика запросов middleware),
+report() возвращает текст отчёта или None.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import random
+
+from django.conf import settings
+from django.core import signing
+from django.utils.module_loading import import_string
+
+PROFILE_HEADER_SALT = "monitoring.profile-request"
+
+logger = logging.getLogger(__name__)
+
+
+def profile_header_value():
+    """Значение заголовка, включающего профилирование запроса."""
+    return signing.TimestampSigner(salt=PROFILE_HEADER_SALT).sign("profile")
+
+
+def request_trigger(request):
+    """Причина профилировать запрос: "header", "sample" или None."""
+    header = request.META.get("HTTP_X_PROFILE")
+    if header:
+        try:
+            signing.TimestampSigner(salt=PROFILE_HEADER_SALT).unsign(
+                header, max_age=settings.SLOW_REQUEST_PROFILE_HEADER_MAX_AGE)
+            return "header"
+        except signing.BadSignature:
+            pass
+    if random.random() < settings.SLOW_REQUEST_PROFILE_RATE:
+        return "sample"
+    return None
+
+
+class Profiler:
+    @classmethod
+    def for_request(cls, request):
+        """Профилировщик для запроса или None, если профилировать не
+        нужно."""
+        trigger = request_trigger(request)
+        return cls() if trigger else None
+
+    def start(self):
+        pass
+
+    def query(self, sql, duration):
+        pass
+
+    def stop(self):
+        pass
+
+    def report(self, request, response, duration):
+        return None
+
+
+class CProfileProfiler(Profiler):
+    def start(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def report(self, request, response, duration):
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats(
+            "cumulative").print_stats(40)
+        return stream.getvalue()
+
+
+class PyInstrumentProfiler(Profiler):
+    """Сэмплирующий профилировщик, нужен пакет pyinstrument."""
+
+    def start(self):
+        import pyinstrument
+
+        self.profiler = pyinstrument.Profiler()
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def report(self, request, response, duration):
+        return self.profiler.output_text()
+
+
+def get_profiler(request):
+    """Профилировщик для текущего запроса или None."""
+    if not settings.SLOW_REQUEST_PROFILER:
+        return None
+    return import_string(settings.SLOW_REQUEST_PROFILER).for_request(request)
+
+
+def report_slow_request(request, duration, profile):
+    import_string(settings.SLOW_REQUEST_HANDLER)(request, duration, profile)
+
+
+def log_slow_request(request, duration, profile):
+    logger.warning(
+        "Медленный запрос %s %s: %.3f с\n%s",
+        request.method, request.path, duration, profile or "",
+    )
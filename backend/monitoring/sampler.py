@@ -0,0 +1,151 @@
+"""Сэмплирующий профилировщик запросов по настенному времени.
+
+Подключается как SLOW_REQUEST_PROFILER = "monitoring.sampler.
+SamplingProfiler". Фоновый поток раз в SLOW_REQUEST_PROFILE_INTERVAL
+снимает стеки потоков, которые обрабатывают профилируемые запросы, через
+sys._current_frames(). Стеки копятся в свёрнутом виде (формат
+stackcollapse для flamegraph.pl и speedscope) и вместе с SQL сохраняются
+в кольцевой буфер на диске (profiles.py).
+
+Кроме отобранных запросов, профилируется любой запрос дольше
+SLOW_REQUEST_PROFILE_THRESHOLD - с момента превышения порога.
+Неотобранный запрос стоит одной вставки и удаления в словаре; поток, в
+котором нет активных запросов, только спит.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import profiles
+from .middleware import view_labels
+from .profiling import Profiler, request_trigger
+
+MAX_DEPTH = 128
+
+
+def frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__") or os.path.basename(
+        code.co_filename)
+    return f"{module}.{code.co_name}:{frame.f_lineno}"
+
+
+def collapse(frame):
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    def __init__(self, interval, threshold):
+        self.interval = interval
+        self.threshold = threshold
+        self.sessions = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def register(self, session):
+        self.sessions[threading.get_ident()] = session
+        self._wakeup.set()
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="request-sampler",
+                        daemon=True)
+                    self._thread.start()
+
+    def unregister(self):
+        self.sessions.pop(threading.get_ident(), None)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            self._wakeup.clear()
+            if not self.sessions:
+                self._wakeup.wait()
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            frames = None
+            for ident, session in list(self.sessions.items()):
+                if not session.profiling:
+                    if not self.threshold or (
+                            now - session.started < self.threshold):
+                        continue
+                    session.trigger = "threshold"
+                    session.profiling = True
+                if frames is None:
+                    frames = sys._current_frames()
+                frame = frames.get(ident)
+                if frame is not None and ident != own:
+                    session.stacks[collapse(frame)] += 1
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = StackSampler(
+                settings.SLOW_REQUEST_PROFILE_INTERVAL,
+                settings.SLOW_REQUEST_PROFILE_THRESHOLD,
+            )
+        return _sampler
+
+
+class SamplingProfiler(Profiler):
+    """Профиль одного запроса: стеки и SQL после начала профилирования."""
+
+    def __init__(self, trigger=None):
+        self.trigger = trigger
+        self.profiling = trigger is not None
+        self.stacks = Counter()
+        self.queries = []
+
+    @classmethod
+    def for_request(cls, request):
+        trigger = request_trigger(request)
+        if trigger is None and not settings.SLOW_REQUEST_PROFILE_THRESHOLD:
+            return None
+        return cls(trigger)
+
+    def start(self):
+        self.started = time.perf_counter()
+        get_sampler().register(self)
+
+    def query(self, sql, duration):
+        if self.profiling:
+            self.queries.append((sql, round(duration * 1000, 3)))
+
+    def stop(self):
+        get_sampler().unregister()
+
+    def report(self, request, response, duration):
+        if not self.profiling:
+            return None
+        view, action = view_labels(request)
+        name = profiles.save({
+            "created": timezone.now().isoformat(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "view": view,
+            "action": action,
+            "status": response.status_code,
+            "trigger": self.trigger,
+            "duration_ms": round(duration * 1000, 3),
+            "interval_ms": settings.SLOW_REQUEST_PROFILE_INTERVAL * 1000,
+            "stacks": dict(self.stacks.most_common()),
+            "queries": self.queries,
+        })
+        return f"Профиль сохранён: {name}"
@@ -0,0 +1,30 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, generate_latest,
+                               multiprocess)
+
+from .collectors import TaskQueueCollector
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus."""
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(
+                request.headers.get("Authorization", ""), expected):
+            return HttpResponseForbidden()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    extra = CollectorRegistry()
+    extra.register(TaskQueueCollector())
+    return HttpResponse(
+        generate_latest(registry) + generate_latest(extra),
+        content_type=CONTENT_TYPE_LATEST,
+    )
@@ -1,23 +1,49 @@
 from django.contrib import admin
 from django.contrib.admin import display
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
+from foodgram.admin_mixins import LargeTableAdminMixin
 from .models import (Favourite, Ingredient, IngredientRecipe, Recipe,
                      ShoppingCart, Tag)
+from .nutrition import refresh_nutrition
+from .snapshots import refresh_snapshots
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("name", "id", "author", "added_in_favorites", "short_link")
+    list_select_related = ("author",)
     readonly_fields = ("added_in_favorites",)
-    list_filter = (
-        "author",
-        "tags",
-    )
-    search_fields = ("name", "author__username", "author__email")
+    list_filter = ("tags",)
+    raw_id_fields = ("author",)
+    exact_search_fields = {
+        "id": int,
+        "name__startswith": str,
+        "short_link": str,
+        "author__email": str,
+        "author__username": str,
+    }
+
+    def get_queryset(self, request):
+        # Подзапрос считается только для строк текущей страницы,
+        # в отличие от JOIN с GROUP BY по всей таблице.
+        favorites = (
+            Favourite.objects.filter(recipe=OuterRef("pk"))
+            .order_by().values("recipe").annotate(count=Count("id"))
+            .values("count")
+        )
+        return super().get_queryset(request).annotate(
+            favorites_count=Coalesce(Subquery(favorites), 0))
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if "servings" in form.changed_data:
+            refresh_nutrition([obj.pk])
 
     @display(description="Общее число добавлений этого рецепта в избранное")
     def added_in_favorites(self, obj):
-        return obj.favourites.count()
+        return obj.favorites_count
 
 
 @admin.register(Ingredient)
@@ -25,8 +51,11 @@ class IngredientAdmin(admin.ModelAdmin):
     list_display = (
         "name",
         "measurement_unit",
+        "calories",
+        "price",
     )
     search_fields = ("name",)
+    ordering = ("name",)
 
 
 @admin.register(Tag)
@@ -38,26 +67,58 @@ class TagAdmin(admin.ModelAdmin):
     )
 
 
-@admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class UserRecipeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         "user",
         "recipe",
     )
+    list_select_related = ("user", "recipe")
+    raw_id_fields = ("user", "recipe")
+    exact_search_fields = {
+        "user__email": str,
+        "user__username": str,
+        "recipe_id": int,
+    }
+
+
+@admin.register(ShoppingCart)
+class ShoppingCartAdmin(UserRecipeAdmin):
+    pass
 
 
 @admin.register(Favourite)
-class FavouriteAdmin(admin.ModelAdmin):
-    list_display = (
-        "user",
-        "recipe",
-    )
+class FavouriteAdmin(UserRecipeAdmin):
+    pass
 
 
 @admin.register(IngredientRecipe)
-class IngredientRecipeAdmin(admin.ModelAdmin):
+class IngredientRecipeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         "recipe",
         "ingredient",
         "amount",
     )
+    list_select_related = ("recipe", "ingredient")
+    raw_id_fields = ("recipe",)
+    autocomplete_fields = ("ingredient",)
+    exact_search_fields = {
+        "recipe_id": int,
+        "ingredient_id": int,
+    }
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        recipe_ids = {obj.recipe_id, form.initial.get("recipe")} - {None}
+        refresh_snapshots(recipe_ids)
+        refresh_nutrition(recipe_ids)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_snapshots([obj.recipe_id])
+        refresh_nutrition([obj.recipe_id])
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list("recipe_id", flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_snapshots(recipe_ids)
+        refresh_nutrition(recipe_ids)
@@ -0,0 +1,267 @@
+"""Выгрузка и загрузка набора данных сжатыми колоночными чанками.
+
+Каталог выгрузки содержит manifest.json и по подкаталогу на таблицу с
+файлами NNNNN.json.gz. Чанк — JSON {"колонка": [значения, ...]} длиной
+не больше chunk_size строк; в манифесте для каждого чанка записаны
+число строк, первый и последний первичный ключ и sha256 файла. В памяти
+одновременно находится только один чанк.
+
+Файлы изображений и аватаров не выгружаются: в данных только их пути.
+Токены, похожие рецепты и очередь задач тоже не переносятся — первые
+выдаются заново, вторые пересчитывает build_recommendations.
+"""
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from users.models import Subscribe, User
+from .models import (Favourite, Ingredient, IngredientRecipe, Recipe,
+                     ShoppingCart, Tag)
+
+FORMAT_VERSION = 1
+CHUNK_SIZE = 100000
+MANIFEST = "manifest.json"
+
+
+class DatasetEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder без округления времени до миллисекунд."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def dataset_models():
+    """Выгружаемые модели в порядке зависимостей внешних ключей."""
+    return [
+        Tag, Ingredient, User, Recipe, Recipe.tags.through,
+        IngredientRecipe, Favourite, ShoppingCart, Subscribe,
+    ]
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def export_table(model, path, using, chunk_size):
+    """Выгружает таблицу чанками по первичному ключу и возвращает её
+    запись для манифеста."""
+    table = model._meta.db_table
+    names = columns(model)
+    pk_index = names.index(model._meta.pk.attname)
+    os.makedirs(os.path.join(path, table), exist_ok=True)
+    queryset = model._base_manager.using(using).order_by(
+        "pk").values_list(*names)
+    chunks = []
+    last = None
+    while True:
+        batch = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(batch[:chunk_size])
+        if not rows:
+            break
+        last = rows[-1][pk_index]
+        data = dict(zip(names, map(list, zip(*rows))))
+        compressed = gzip.compress(
+            json.dumps(data, cls=DatasetEncoder,
+                       ensure_ascii=False).encode(),
+            compresslevel=6,
+        )
+        name = os.path.join(table, f"{len(chunks):05d}.json.gz")
+        with open(os.path.join(path, name), "wb") as file:
+            file.write(compressed)
+        chunks.append({
+            "file": name,
+            "rows": len(rows),
+            "first": rows[0][pk_index],
+            "last": last,
+            "sha256": hashlib.sha256(compressed).hexdigest(),
+        })
+    return {
+        "model": model._meta.label,
+        "table": table,
+        "columns": names,
+        "rows": sum(chunk["rows"] for chunk in chunks),
+        "chunks": chunks,
+    }
+
+
+def export_dataset(path, using, chunk_size=CHUNK_SIZE, progress=None):
+    """Выгружает все таблицы набора в каталог path.
+
+    На PostgreSQL выгрузка идёт в одной транзакции REPEATABLE READ, так
+    что все таблицы соответствуют одному моменту времени.
+    """
+    os.makedirs(path, exist_ok=True)
+    connection = connections[using]
+    tables = []
+    with transaction.atomic(using=using):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, "
+                    "READ ONLY")
+        for model in dataset_models():
+            entry = export_table(model, path, using, chunk_size)
+            tables.append(entry)
+            if progress:
+                progress(entry)
+    manifest = {
+        "version": FORMAT_VERSION,
+        "created": timezone.now().isoformat(),
+        "tables": tables,
+    }
+    with open(os.path.join(path, MANIFEST), "w") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST)) as file:
+        manifest = json.load(file)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Неподдерживаемая версия выгрузки: {manifest.get('version')}")
+    known = {model._meta.label: model for model in dataset_models()}
+    for entry in manifest["tables"]:
+        model = known.get(entry["model"])
+        if model is None:
+            raise ValueError(f"Неизвестная модель {entry['model']}")
+        unknown = set(entry["columns"]) - set(columns(model))
+        if unknown:
+            raise ValueError(
+                f"{entry['model']}: нет колонок {', '.join(sorted(unknown))}")
+        entry["model"] = model
+        # Колонки, добавленные после выгрузки, заполняются значениями по
+        # умолчанию: COPY не знает о default модели.
+        entry["defaults"] = {
+            field.attname: field.get_default()
+            for field in model._meta.concrete_fields
+            if field.attname not in entry["columns"]
+        }
+    return manifest
+
+
+def read_chunk(path, chunk):
+    with open(os.path.join(path, chunk["file"]), "rb") as file:
+        compressed = file.read()
+    if hashlib.sha256(compressed).hexdigest() != chunk["sha256"]:
+        raise ValueError(f"Контрольная сумма не совпадает: {chunk['file']}")
+    return json.loads(gzip.decompress(compressed))
+
+
+def copy_value(value, is_json):
+    """Значение в текстовом формате COPY."""
+    if value is None:
+        return "\\N"
+    if is_json:
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t")
+        .replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def fields_by_attname(model, names):
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    return [fields[name] for name in names]
+
+
+def copy_chunk(connection, model, names, data):
+    """Загружает чанк в PostgreSQL одной командой COPY."""
+    json_columns = [
+        isinstance(field, models.JSONField)
+        for field in fields_by_attname(model, names)
+    ]
+    buffer = io.StringIO()
+    for row in zip(*(data[name] for name in names)):
+        buffer.write("\t".join(
+            copy_value(value, is_json)
+            for value, is_json in zip(row, json_columns)))
+        buffer.write("\n")
+    buffer.seek(0)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} "
+            f"({', '.join(quote(name) for name in names)}) FROM STDIN",
+            buffer,
+        )
+
+
+def bulk_chunk(using, model, names, data):
+    """Загружает чанк через bulk_create — для БД без COPY."""
+    fields = fields_by_attname(model, names)
+    model._base_manager.using(using).bulk_create(
+        (
+            model(**{
+                field.attname: field.to_python(value)
+                for field, value in zip(fields, row)
+            })
+            for row in zip(*(data[name] for name in names))
+        ),
+        batch_size=1000,
+    )
+
+
+def import_dataset(path, using, truncate=False, progress=None):
+    """Загружает выгрузку из каталога path в одной транзакции.
+
+    Таблицы должны быть пустыми, если не передан truncate: тогда они
+    очищаются вместе со ссылающимися на них (токены, похожие рецепты).
+    После загрузки сбрасываются последовательности первичных ключей и
+    общий кэш, на PostgreSQL обновляется статистика таблиц.
+    """
+    manifest = read_manifest(path)
+    connection = connections[using]
+    dataset = [entry["model"] for entry in manifest["tables"]]
+    with transaction.atomic(using=using):
+        if truncate:
+            connection.ops.execute_sql_flush(connection.ops.sql_flush(
+                no_style(), [model._meta.db_table for model in dataset],
+                allow_cascade=True,
+            ))
+        else:
+            filled = [
+                model._meta.label for model in dataset
+                if model._base_manager.using(using).exists()
+            ]
+            if filled:
+                raise ValueError(
+                    f"Таблицы не пусты: {', '.join(filled)}")
+        for entry in manifest["tables"]:
+            model = entry["model"]
+            names = entry["columns"] + list(entry["defaults"])
+            for chunk in entry["chunks"]:
+                data = read_chunk(path, chunk)
+                for name, value in entry["defaults"].items():
+                    data[name] = [value] * chunk["rows"]
+                if connection.vendor == "postgresql":
+                    copy_chunk(connection, model, names, data)
+                else:
+                    bulk_chunk(using, model, names, data)
+            if progress:
+                progress(entry)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), dataset):
+                cursor.execute(sql)
+    # Кэш ссылается на удалённые строки: токены, ленты, версию тегов.
+    cache.clear()
+    if connection.vendor == "postgresql":
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model in dataset:
+                cursor.execute(f"ANALYZE {quote(model._meta.db_table)}")
+    return manifest
@@ -0,0 +1,175 @@
+"""Лента рецептов авторов, на которых подписан пользователь.
+
+Id нового рецепта обычного автора раскладывается по кэшированным лентам
+подписчиков (fan-out on write). Рецепты авторов, у которых больше
+FEED_FANOUT_MAX_FOLLOWERS подписчиков, не раскладываются, а дочитываются
+из БД при запросе ленты (fan-out on read). Лента в кэше - список id по
+убыванию длиной не больше FEED_MAX_LENGTH; при промахе она собирается
+заново одним запросом по индексу (author, -id).
+"""
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from monitoring.metrics import cache_lookup
+from users.models import Subscribe
+from .models import Recipe
+
+FEED_LOCK_POLL = 0.01
+
+
+def feed_cache_key(user_id):
+    return f"feed:{user_id}"
+
+
+def feed_lock_cache_key(user_id):
+    return f"feed:lock:{user_id}"
+
+
+def follower_count_cache_key(author_id):
+    return f"feed:followers:{author_id}"
+
+
+def follower_counts(author_ids):
+    """author_id -> число подписчиков, с кэшированием на
+    FEED_FOLLOWER_COUNT_TTL."""
+    keys = {follower_count_cache_key(pk): pk for pk in author_ids}
+    counts = {
+        keys[key]: value for key, value in cache.get_many(keys).items()}
+    missing = [pk for pk in author_ids if pk not in counts]
+    cache_lookup("follower_count", not missing)
+    if missing:
+        fresh = dict.fromkeys(missing, 0)
+        fresh.update(
+            Subscribe.objects.filter(author_id__in=missing)
+            .values("author_id").annotate(count=Count("id"))
+            .values_list("author_id", "count")
+        )
+        cache.set_many(
+            {follower_count_cache_key(pk): count
+             for pk, count in fresh.items()},
+            settings.FEED_FOLLOWER_COUNT_TTL,
+        )
+        counts.update(fresh)
+    return counts
+
+
+def is_fan_out_author(count):
+    return count <= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def recent_recipe_ids(author_ids, before=None, limit=None):
+    queryset = Recipe.objects.filter(author_id__in=author_ids)
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    return list(
+        queryset.order_by("-id").values_list("id", flat=True)[:limit])
+
+
+def cached_feed(user_id, author_ids):
+    key = feed_cache_key(user_id)
+    feed = cache.get(key)
+    cache_lookup("feed", feed is not None)
+    if feed is None:
+        feed = recent_recipe_ids(author_ids, limit=settings.FEED_MAX_LENGTH)
+        cache.set(key, feed, settings.FEED_CACHE_TTL)
+    return feed
+
+
+def feed_page(user_id, before, limit):
+    """Id рецептов страницы ленты старше before и флаг продолжения."""
+    authors = list(
+        Subscribe.objects.filter(user_id=user_id)
+        .values_list("author_id", flat=True)
+    )
+    if not authors:
+        return [], False
+    counts = follower_counts(authors)
+    push = [pk for pk in authors if is_fan_out_author(counts[pk])]
+    pull = [pk for pk in authors if not is_fan_out_author(counts[pk])]
+    want = limit + 1
+    candidates = []
+    if push:
+        feed = cached_feed(user_id, push)
+        candidates = [
+            pk for pk in feed if before is None or pk < before][:want]
+        if len(candidates) < want and len(feed) >= settings.FEED_MAX_LENGTH:
+            # В кэше только начало ленты, остальное читается из БД.
+            floor = feed[-1] if before is None else min(feed[-1], before)
+            candidates += recent_recipe_ids(
+                push, floor, want - len(candidates))
+    if pull:
+        candidates += recent_recipe_ids(pull, before, want)
+    ids = sorted(set(candidates), reverse=True)
+    return ids[:limit], len(ids) > limit
+
+
+def acquire_feed_lock(user_id):
+    """Захватить блокировку ленты, ожидая не дольше FEED_LOCK_TTL."""
+    key = feed_lock_cache_key(user_id)
+    deadline = time.monotonic() + settings.FEED_LOCK_TTL
+    while not cache.add(key, True, settings.FEED_LOCK_TTL):
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(FEED_LOCK_POLL)
+    return True
+
+
+def push_to_feed(user_id, recipe_id):
+    """Добавить рецепт в ленту под блокировкой ленты.
+
+    Без блокировки два рецепта, раскладываемые одновременно, перезаписали
+    бы ленту друг друга. Если блокировку не дождаться, лента удаляется и
+    при чтении соберётся из БД.
+    """
+    key = feed_cache_key(user_id)
+    if not acquire_feed_lock(user_id):
+        cache.delete(key)
+        return
+    try:
+        feed = cache.get(key)
+        if feed is not None and recipe_id not in feed:
+            cache.set(
+                key,
+                sorted({recipe_id, *feed}, reverse=True)[
+                    :settings.FEED_MAX_LENGTH],
+                settings.FEED_CACHE_TTL,
+            )
+    finally:
+        cache.delete(feed_lock_cache_key(user_id))
+
+
+def push_to_feeds(user_ids, recipe_id):
+    """Добавить рецепт в ленты, которые уже есть в кэше.
+
+    Отсутствующие ленты не создаются: при чтении они соберутся из БД
+    вместе с новым рецептом.
+    """
+    keys = {feed_cache_key(pk): pk for pk in user_ids}
+    for key, feed in cache.get_many(keys).items():
+        if recipe_id not in feed:
+            push_to_feed(keys[key], recipe_id)
+
+
+def fan_out(recipe_id, author_id):
+    if not is_fan_out_author(follower_counts([author_id])[author_id]):
+        return
+    followers = (
+        Subscribe.objects.filter(author_id=author_id)
+        .order_by("user_id").values_list("user_id", flat=True)
+        .iterator(chunk_size=settings.FEED_FANOUT_BATCH)
+    )
+    while True:
+        batch = list(islice(followers, settings.FEED_FANOUT_BATCH))
+        if not batch:
+            break
+        push_to_feeds(batch, recipe_id)
+
+
+def subscription_changed(user_id, author_id):
+    """Сбросить ленту подписчика и счётчик подписчиков автора."""
+    cache.delete_many(
+        [feed_cache_key(user_id), follower_count_cache_key(author_id)])
@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.recommendations import build_all, build_new
+
+
+class Command(BaseCommand):
+    help = (
+        "Рассчитать похожие рецепты по совместному избранному и "
+        "ингредиентам. Без --new пересчитывает все рецепты."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--new", action="store_true",
+            help="Только рецепты, для которых соседи ещё не рассчитаны")
+        parser.add_argument(
+            "--top-k", type=int, default=settings.RECOMMENDATIONS_TOP_K)
+        parser.add_argument(
+            "--block-size", type=int, default=1000,
+            help="Сколько строк матрицы близости считать за раз")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        build = build_new if options["new"] else build_all
+        count = build(options["top_k"], options["block_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Рецептов обработано: {count} "
+            f"за {time.monotonic() - started:.1f} с"))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from recipes.snapshots import BATCH_SIZE, build_snapshots, refresh_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверить снимки ингредиентов рецептов с IngredientRecipe "
+        "и при --fix пересобрать разошедшиеся."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true", help="Исправить расхождения")
+
+    def handle(self, *args, **options):
+        drifted = []
+        checked = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Recipe.objects.filter(id__gt=last_id).order_by("id")
+                .values_list("id", "ingredients_snapshot")[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            expected = build_snapshots([pk for pk, _ in batch])
+            drifted.extend(
+                pk for pk, snapshot in batch
+                if [list(item) for item in expected[pk]] != snapshot
+            )
+            checked += len(batch)
+            last_id = batch[-1][0]
+        self.stdout.write(
+            f"Проверено рецептов: {checked}, расхождений: {len(drifted)}")
+        if not drifted:
+            return
+        if options["fix"]:
+            refresh_snapshots(drifted)
+            self.stdout.write(self.style.SUCCESS(
+                f"Исправлено: {len(drifted)}"))
+        else:
+            raise CommandError(
+                "Снимки расходятся, запустите с --fix. Первые id: "
+                + ", ".join(map(str, drifted[:20]))
+            )
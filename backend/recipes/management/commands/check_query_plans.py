@@ -0,0 +1,105 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from recipes.models import (Favourite, IngredientRecipe, Recipe,
+                            RecipeSimilarity, ShoppingCart)
+from users.models import Subscribe, User
+
+
+def unique_index(model, name):
+    """Имя индекса уникального ограничения в плане запроса.
+
+    SQLite называет индексы ограничений из CREATE TABLE сам.
+    """
+    return name, f"sqlite_autoindex_{model._meta.db_table}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверить, что планировщик использует индексы горячих запросов. "
+        "Запускать на заполненной базе (generate_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Обновить статистику планировщика перед проверкой",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Печатать планы целиком",
+        )
+
+    def get_checks(self):
+        user = User.objects.filter(favorites__isnull=False).first()
+        recipe = Recipe.objects.order_by("-id").first()
+        if user is None or recipe is None:
+            raise CommandError("База пуста, сначала заполните её данными")
+        author_id = recipe.author_id
+        return [
+            (
+                "Избранное пользователя (is_favorited)",
+                Recipe.objects.filter(favorites__user=user).order_by("-id"),
+                unique_index(Favourite, "unique_favourite"),
+            ),
+            (
+                "Корзина пользователя (is_in_shopping_cart)",
+                Recipe.objects.filter(
+                    shopping_cart__user=user).order_by("-id"),
+                unique_index(ShoppingCart, "unique_shopping_cart"),
+            ),
+            (
+                "Проверка рецепта в избранном",
+                Favourite.objects.filter(user=user, recipe=recipe),
+                unique_index(Favourite, "unique_favourite"),
+            ),
+            (
+                "Проверка рецепта в корзине",
+                ShoppingCart.objects.filter(user=user, recipe=recipe),
+                unique_index(ShoppingCart, "unique_shopping_cart"),
+            ),
+            (
+                "Рецепты автора",
+                Recipe.objects.filter(author_id=author_id).order_by("-id"),
+                ("recipe_author_id_idx",),
+            ),
+            (
+                "Ингредиенты рецепта",
+                IngredientRecipe.objects.filter(recipe=recipe).values(
+                    "ingredient_id", "amount"),
+                ("ingredientrecipe_cover_idx",),
+            ),
+            (
+                "Похожие рецепты",
+                RecipeSimilarity.objects.filter(recipe=recipe).order_by(
+                    "-score").values_list("similar_id", flat=True),
+                ("recipesimilarity_score_idx",),
+            ),
+            (
+                "Подписки пользователя",
+                User.objects.filter(subscriptions_sent__user=user),
+                unique_index(Subscribe, "unique_subscription"),
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        if options["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        failed = []
+        for label, queryset, indexes in self.get_checks():
+            plan = queryset.explain()
+            used = next((index for index in indexes if index in plan), None)
+            if used:
+                self.stdout.write(self.style.SUCCESS(f"OK   {label}: {used}"))
+            else:
+                failed.append(label)
+                self.stdout.write(self.style.ERROR(
+                    f"FAIL {label}: ожидался {indexes[0]}"))
+            if options["verbose_plans"] or not used:
+                self.stdout.write(plan)
+        if failed:
+            raise CommandError(
+                f"Индексы не используются: {', '.join(failed)}")
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.dataset import CHUNK_SIZE, export_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгрузить рецепты, ингредиенты, теги, пользователей, избранное, "
+        "корзины и подписки в каталог сжатых колоночных чанков."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Каталог выгрузки")
+        parser.add_argument(
+            "--database", default=DEFAULT_DB_ALIAS,
+            help="Псевдоним БД, например реплики")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(entry):
+            self.stdout.write(
+                f"{entry['model']}: {entry['rows']} строк, "
+                f"{len(entry['chunks'])} чанков, "
+                f"{time.monotonic() - started:.1f} с")
+
+        export_dataset(
+            options["path"], options["database"], options["chunk_size"],
+            progress)
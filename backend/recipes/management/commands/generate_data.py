@@ -0,0 +1,222 @@
+import random
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import (Favourite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from recipes.nutrition import refresh_nutrition
+from recipes.snapshots import refresh_snapshots
+from recipes.units import normalize_queryset
+from users.models import Subscribe, User
+
+BATCH_SIZE = 5000
+PASSWORD = "foodgram-bench"
+TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+    ("Десерт", "#F2C94C", "dessert"),
+    ("Перекус", "#56CCF2", "snack"),
+)
+
+
+def zipf_weights(size, exponent=1.1):
+    """Накопленные веса распределения Ципфа для random.choices."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+def chunked(iterable, size=BATCH_SIZE):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Сгенерировать синтетические данные с реалистичными перекосами: "
+        "популярные авторы и рецепты получают большую часть подписок "
+        "и добавлений в избранное."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=5000)
+        parser.add_argument("--favourites", type=int, default=20,
+                            help="Среднее число избранных на пользователя")
+        parser.add_argument("--cart", type=int, default=5,
+                            help="Среднее число рецептов в корзине")
+        parser.add_argument("--subscriptions", type=int, default=10,
+                            help="Среднее число подписок на пользователя")
+        parser.add_argument("--domain", default="localhost",
+                            help="Домен коротких ссылок")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        tag_ids = self.ensure_tags()
+        ingredient_ids = self.ensure_ingredients()
+        user_ids = self.create_users(options["users"])
+        recipe_ids = self.create_recipes(
+            options["recipes"], user_ids, options["domain"])
+        self.link_tags(recipe_ids, tag_ids)
+        self.link_ingredients(recipe_ids, ingredient_ids)
+        refresh_snapshots(recipe_ids)
+        refresh_nutrition(recipe_ids)
+        recipe_weights = zipf_weights(len(recipe_ids))
+        self.link_users(
+            Favourite, "recipe_id", user_ids, recipe_ids, recipe_weights,
+            options["favourites"])
+        self.link_users(
+            ShoppingCart, "recipe_id", user_ids, recipe_ids, recipe_weights,
+            options["cart"])
+        self.link_users(
+            Subscribe, "author_id", user_ids, user_ids,
+            zipf_weights(len(user_ids)), options["subscriptions"])
+
+    def bulk_insert(self, model, objects, **kwargs):
+        total = 0
+        for chunk in chunked(objects):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, **kwargs)
+            total += len(chunk)
+        self.stdout.write(f"{model._meta.label}: +{total}")
+
+    def new_ids(self, model, last_id):
+        return list(
+            model.objects.filter(id__gt=last_id)
+            .order_by("id").values_list("id", flat=True)
+        )
+
+    def last_id(self, model):
+        return model.objects.order_by("-id").values_list(
+            "id", flat=True).first() or 0
+
+    def ensure_tags(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in TAGS
+            )
+        return list(Tag.objects.values_list("id", flat=True))
+
+    def ensure_ingredients(self):
+        if not Ingredient.objects.exists():
+            self.bulk_insert(Ingredient, (
+                Ingredient(
+                    name=f"ингредиент {number}", measurement_unit="г",
+                    **self.reference_values())
+                for number in range(1, 2001)
+            ))
+        return list(Ingredient.objects.values_list("id", flat=True))
+
+    def reference_values(self):
+        """Пищевая ценность и цена на 1 г; у 1% ингредиентов данных нет.
+
+        Сумма по рецепту пуста, если данных нет хотя бы у одного
+        ингредиента, поэтому доля должна быть малой.
+        """
+        if self.random.random() < 0.01:
+            return {}
+        proteins, fats, carbohydrates = (
+            self.random.uniform(0, limit) for limit in (0.3, 0.5, 0.8))
+        return {
+            "proteins": Decimal(f"{proteins:.4f}"),
+            "fats": Decimal(f"{fats:.4f}"),
+            "carbohydrates": Decimal(f"{carbohydrates:.4f}"),
+            "calories": Decimal(
+                f"{4 * proteins + 9 * fats + 4 * carbohydrates:.4f}"),
+            "price": Decimal(f"{self.random.uniform(0.05, 3):.4f}"),
+        }
+
+    def create_users(self, count):
+        last_id = self.last_id(User)
+        password = make_password(PASSWORD)
+        self.bulk_insert(User, (
+            User(
+                username=f"user{last_id + number}",
+                email=f"user{last_id + number}@example.com",
+                first_name="Имя",
+                last_name="Фамилия",
+                password=password,
+            )
+            for number in range(1, count + 1)
+        ))
+        return self.new_ids(User, last_id)
+
+    def create_recipes(self, count, user_ids, domain):
+        last_id = self.last_id(Recipe)
+        author_weights = zipf_weights(len(user_ids))
+        authors = self.random.choices(
+            user_ids, cum_weights=author_weights, k=count)
+        self.bulk_insert(Recipe, (
+            Recipe(
+                author_id=author_id,
+                name=f"Рецепт {last_id + number}",
+                text="Описание рецепта. " * self.random.randint(5, 60),
+                cooking_time=self.random.randint(5, 180),
+                servings=self.random.randint(1, 6),
+                short_link=f"{domain}/s/bench{last_id + number}",
+            )
+            for number, author_id in enumerate(authors, start=1)
+        ))
+        return self.new_ids(Recipe, last_id)
+
+    def link_tags(self, recipe_ids, tag_ids):
+        through = Recipe.tags.through
+        self.bulk_insert(through, (
+            through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in self.random.sample(
+                tag_ids, self.random.randint(1, min(3, len(tag_ids))))
+        ))
+
+    def link_ingredients(self, recipe_ids, ingredient_ids):
+        weights = zipf_weights(len(ingredient_ids), exponent=0.9)
+        shuffled = ingredient_ids[:]
+        self.random.shuffle(shuffled)
+
+        def links():
+            for recipe_id in recipe_ids:
+                chosen = set(self.random.choices(
+                    shuffled, cum_weights=weights,
+                    k=self.random.randint(3, 12)))
+                for ingredient_id in chosen:
+                    yield IngredientRecipe(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=self.random.randint(1, 300),
+                    )
+
+        last_id = self.last_id(IngredientRecipe)
+        self.bulk_insert(IngredientRecipe, links())
+        normalize_queryset(IngredientRecipe.objects.filter(id__gt=last_id))
+
+    def link_users(self, model, target_field, user_ids, target_ids,
+                   weights, mean):
+        """Связи пользователь -> цель: число на пользователя
+        экспоненциальное, цели выбираются по Ципфу."""
+        if not mean or not target_ids:
+            return
+
+        def links():
+            for user_id in user_ids:
+                count = min(
+                    int(self.random.expovariate(1 / mean)), len(target_ids))
+                targets = set(self.random.choices(
+                    target_ids, cum_weights=weights, k=count))
+                targets.discard(user_id if target_field == "author_id"
+                                else None)
+                for target_id in targets:
+                    yield model(user_id=user_id, **{target_field: target_id})
+
+        self.bulk_insert(model, links(), ignore_conflicts=True)
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.dataset import import_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Загрузить выгрузку export_dataset: COPY на PostgreSQL, "
+        "bulk_create на остальных БД, всё в одной транзакции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Каталог выгрузки")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--truncate", action="store_true",
+            help="Очистить таблицы перед загрузкой")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(entry):
+            self.stdout.write(
+                f"{entry['model']._meta.label}: {entry['rows']} строк, "
+                f"{time.monotonic() - started:.1f} с")
+
+        try:
+            import_dataset(
+                options["path"], options["database"], options["truncate"],
+                progress)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.nutrition import BATCH_SIZE, refresh_nutrition
+from recipes.snapshots import recipes_with_ingredient
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитать пищевую ценность и стоимость порции рецептов: после "
+        "миграции или массового обновления справочных данных ингредиентов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ingredient", type=int, action="append",
+            help="Только рецепты с этим ингредиентом")
+
+    def handle(self, *args, **options):
+        if options["ingredient"]:
+            recipe_ids = set()
+            for ingredient_id in options["ingredient"]:
+                recipe_ids.update(recipes_with_ingredient(ingredient_id))
+            refresh_nutrition(sorted(recipe_ids))
+            self.stdout.write(f"Пересчитано рецептов: {len(recipe_ids)}")
+            return
+        total = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Recipe.objects.filter(id__gt=last_id).order_by("id")
+                .values_list("id", flat=True)[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            refresh_nutrition(batch)
+            total += len(batch)
+            last_id = batch[-1]
+        self.stdout.write(f"Пересчитано рецептов: {total}")
@@ -0,0 +1,64 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import recipes.operations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        recipes.operations.AddIndexConcurrently(
+            model_name="ingredientrecipe",
+            index=models.Index(
+                fields=["recipe"],
+                include=("ingredient", "amount"),
+                name="ingredientrecipe_cover_idx",
+            ),
+        ),
+        recipes.operations.AddIndexConcurrently(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-id"], name="recipe_author_id_idx"
+            ),
+        ),
+        # Одиночный индекс по author_id покрывается recipe_author_id_idx.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="recipe",
+                    name="author",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="recipes",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор публикации",
+                    ),
+                ),
+            ],
+            database_operations=[
+                recipes.operations.RemoveFieldIndexConcurrently(
+                    model_name="recipe",
+                    name="author",
+                ),
+            ],
+        ),
+        recipes.operations.AddUniqueConstraintConcurrently(
+            model_name="ingredientrecipe",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "ingredient"),
+                name="unique_recipe_ingredient",
+            ),
+        ),
+    ]
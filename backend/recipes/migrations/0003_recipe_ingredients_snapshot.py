@@ -0,0 +1,57 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:55
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_snapshots(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    IngredientRecipe = apps.get_model("recipes", "IngredientRecipe")
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        snapshots = {
+            recipe_id: [] for recipe_id in recipe_ids[start:start + BATCH_SIZE]
+        }
+        rows = (
+            IngredientRecipe.objects.filter(recipe_id__in=snapshots)
+            .order_by("id")
+            .values_list(
+                "recipe_id",
+                "ingredient_id",
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                "amount",
+            )
+        )
+        for recipe_id, *item in rows:
+            snapshots[recipe_id].append(item)
+        Recipe.objects.bulk_update(
+            [
+                Recipe(id=recipe_id, ingredients_snapshot=snapshot)
+                for recipe_id, snapshot in snapshots.items()
+            ],
+            ["ingredients_snapshot"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0002_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="ingredients_snapshot",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                editable=False,
+                help_text="[[id, name, measurement_unit, amount], ...]",
+                verbose_name="Снимок ингредиентов",
+            ),
+        ),
+        migrations.RunPython(fill_snapshots, migrations.RunPython.noop),
+    ]
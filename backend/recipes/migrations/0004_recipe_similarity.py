@@ -0,0 +1,66 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_recipe_ingredients_snapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeSimilarity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField(verbose_name="Близость")),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipes.recipe",
+                        verbose_name="Похожий рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожий рецепт",
+                "verbose_name_plural": "Похожие рецепты",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="recipesimilarity",
+            index=models.Index(
+                fields=["recipe", "-score"],
+                include=("similar",),
+                name="recipesimilarity_score_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipesimilarity",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "similar"), name="unique_recipe_similarity"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:05
+
+from django.db import migrations, models
+
+from recipes.units import base_amount_expression, conversion
+
+
+def fill_base_amounts(apps, schema_editor):
+    IngredientRecipe = apps.get_model("recipes", "IngredientRecipe")
+    units = (
+        IngredientRecipe.objects.order_by()
+        .values_list("ingredient__measurement_unit", flat=True)
+        .distinct()
+    )
+    for unit in list(units):
+        base_unit, factor = conversion(unit)
+        IngredientRecipe.objects.filter(
+            ingredient__measurement_unit=unit
+        ).update(
+            base_unit=base_unit, base_amount=base_amount_expression(factor)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_recipe_similarity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredientrecipe",
+            name="base_amount",
+            field=models.DecimalField(
+                decimal_places=3,
+                default=0,
+                editable=False,
+                max_digits=12,
+                verbose_name="Количество в базовой единице",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ingredientrecipe",
+            name="base_unit",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=50,
+                verbose_name="Базовая единица",
+            ),
+        ),
+        migrations.RunPython(fill_base_amounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,152 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:23
+
+import django.core.validators
+from django.db import migrations, models
+
+import recipes.operations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("recipes", "0005_ingredientrecipe_base_unit"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="calories",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                help_text="На 1 г, 1 мл или 1 шт. — базовую единицу ингредиента",
+                max_digits=10,
+                null=True,
+                verbose_name="Калории, ккал",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ingredient",
+            name="carbohydrates",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                help_text="На базовую единицу",
+                max_digits=10,
+                null=True,
+                verbose_name="Углеводы, г",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ingredient",
+            name="fats",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                help_text="На базовую единицу",
+                max_digits=10,
+                null=True,
+                verbose_name="Жиры, г",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ingredient",
+            name="price",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                help_text="За базовую единицу",
+                max_digits=10,
+                null=True,
+                verbose_name="Цена, руб.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ingredient",
+            name="proteins",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                help_text="На базовую единицу",
+                max_digits=10,
+                null=True,
+                verbose_name="Белки, г",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="calories",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=10,
+                null=True,
+                verbose_name="Калории на порцию, ккал",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="carbohydrates",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=10,
+                null=True,
+                verbose_name="Углеводы на порцию, г",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="cost",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=10,
+                null=True,
+                verbose_name="Стоимость порции, руб.",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="fats",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=10,
+                null=True,
+                verbose_name="Жиры на порцию, г",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="proteins",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=10,
+                null=True,
+                verbose_name="Белки на порцию, г",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="servings",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                validators=[django.core.validators.MinValueValidator(1)],
+                verbose_name="Число порций",
+            ),
+        ),
+        recipes.operations.AddIndexConcurrently(
+            model_name="recipe",
+            index=models.Index(
+                fields=["calories"], name="recipe_calories_idx"
+            ),
+        ),
+        recipes.operations.AddIndexConcurrently(
+            model_name="recipe",
+            index=models.Index(fields=["cost"], name="recipe_cost_idx"),
+        ),
+    ]
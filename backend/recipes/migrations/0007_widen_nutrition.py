@@ -0,0 +1,68 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0006_nutrition"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recipe",
+            name="calories",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=14,
+                null=True,
+                verbose_name="Калории на порцию, ккал",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="carbohydrates",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=14,
+                null=True,
+                verbose_name="Углеводы на порцию, г",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="cost",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=14,
+                null=True,
+                verbose_name="Стоимость порции, руб.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="fats",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=14,
+                null=True,
+                verbose_name="Жиры на порцию, г",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="proteins",
+            field=models.DecimalField(
+                decimal_places=2,
+                editable=False,
+                max_digits=14,
+                null=True,
+                verbose_name="Белки на порцию, г",
+            ),
+        ),
+    ]
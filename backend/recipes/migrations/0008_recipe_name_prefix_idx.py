@@ -0,0 +1,25 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:49
+
+from django.db import migrations, models
+
+import recipes.operations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("recipes", "0007_widen_nutrition"),
+    ]
+
+    operations = [
+        recipes.operations.AddIndexConcurrently(
+            model_name="recipe",
+            index=models.Index(
+                fields=["name"],
+                name="recipe_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0008_recipe_name_prefix_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="similar_built_at",
+            field=models.DateTimeField(
+                editable=False,
+                null=True,
+                verbose_name="Похожие рецепты рассчитаны",
+            ),
+        ),
+    ]
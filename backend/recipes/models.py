@@ -1,7 +1,9 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import UniqueConstraint
 
 from users.models import User
+from .units import to_base
 
 
 class Tag(models.Model):
@@ -34,6 +36,46 @@ class Ingredient(models.Model):
     measurement_unit = models.CharField(
         max_length=50,
         verbose_name="Единица измерения")
+    calories = models.DecimalField(
+        max_digits=10,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        verbose_name="Калории, ккал",
+        help_text="На 1 г, 1 мл или 1 шт. — базовую единицу ингредиента",
+    )
+    proteins = models.DecimalField(
+        max_digits=10,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        verbose_name="Белки, г",
+        help_text="На базовую единицу",
+    )
+    fats = models.DecimalField(
+        max_digits=10,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        verbose_name="Жиры, г",
+        help_text="На базовую единицу",
+    )
+    carbohydrates = models.DecimalField(
+        max_digits=10,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        verbose_name="Углеводы, г",
+        help_text="На базовую единицу",
+    )
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        verbose_name="Цена, руб.",
+        help_text="За базовую единицу",
+    )
 
     class Meta:
         verbose_name = "Ингредиент"
@@ -51,6 +93,7 @@ class Recipe(models.Model):
         related_name="recipes",
         on_delete=models.SET_NULL,
         null=True,
+        db_index=False,
         verbose_name="Автор публикации",
     )
     name = models.CharField(
@@ -78,6 +121,58 @@ class Recipe(models.Model):
     cooking_time = models.PositiveIntegerField(
         verbose_name="Время приготовления в минутах",
     )
+    servings = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+        verbose_name="Число порций",
+    )
+    calories = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        verbose_name="Калории на порцию, ккал",
+    )
+    proteins = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        verbose_name="Белки на порцию, г",
+    )
+    fats = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        verbose_name="Жиры на порцию, г",
+    )
+    carbohydrates = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        verbose_name="Углеводы на порцию, г",
+    )
+    cost = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        verbose_name="Стоимость порции, руб.",
+    )
+    ingredients_snapshot = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name="Снимок ингредиентов",
+        help_text="[[id, name, measurement_unit, amount], ...]",
+    )
+    similar_built_at = models.DateTimeField(
+        null=True,
+        editable=False,
+        verbose_name="Похожие рецепты рассчитаны",
+    )
     short_link = models.CharField(
         max_length=50,
         unique=True,
@@ -89,6 +184,18 @@ class Recipe(models.Model):
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=["author", "-id"], name="recipe_author_id_idx"),
+            models.Index(fields=["calories"], name="recipe_calories_idx"),
+            models.Index(fields=["cost"], name="recipe_cost_idx"),
+            # Поиск по началу названия в админке: LIKE 'префикс%'.
+            models.Index(
+                fields=["name"],
+                name="recipe_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -110,6 +217,19 @@ class IngredientRecipe(models.Model):
     amount = models.PositiveSmallIntegerField(
         verbose_name="Количество",
     )
+    base_unit = models.CharField(
+        max_length=50,
+        blank=True,
+        editable=False,
+        verbose_name="Базовая единица",
+    )
+    base_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        default=0,
+        editable=False,
+        verbose_name="Количество в базовой единице",
+    )
 
     class Meta:
         verbose_name = "Ингредиент и рецепт"
@@ -120,10 +240,29 @@ class IngredientRecipe(models.Model):
                     "recipe", "ingredient"], name="unique_recipe_ingredient"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["recipe"],
+                include=["ingredient", "amount"],
+                name="ingredientrecipe_cover_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.recipe.name} - {self.ingredient.name} ({self.amount})"
 
+    def fill_base(self):
+        """Заполнить базовые единицы; bulk_create save() не вызывает."""
+        self.base_unit, self.base_amount = to_base(
+            self.ingredient.measurement_unit, self.amount)
+
+    def save(self, *args, **kwargs):
+        self.fill_base()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {
+                *kwargs["update_fields"], "base_unit", "base_amount"}
+        super().save(*args, **kwargs)
+
 
 class Favourite(models.Model):
     """Класс модели Избранное"""
@@ -181,3 +320,40 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'"{self.recipe}" добавлен в корзину'
+
+
+class RecipeSimilarity(models.Model):
+    """Класс модели Похожий рецепт (заполняет build_recommendations)"""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="similar",
+        db_index=False,
+        verbose_name="Рецепт",
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Похожий рецепт",
+    )
+    score = models.FloatField(verbose_name="Близость")
+
+    class Meta:
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        constraints = [
+            UniqueConstraint(
+                fields=["recipe", "similar"], name="unique_recipe_similarity")
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "-score"],
+                include=["similar"],
+                name="recipesimilarity_score_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id} -> {self.similar_id} ({self.score:.3f})"
@@ -0,0 +1,177 @@
+"""Пищевая ценность и стоимость порции рецепта.
+
+Справочные значения хранятся у ингредиента в расчёте на одну базовую
+единицу (г, мл или шт., см. units.py) и умножаются на
+IngredientRecipe.base_amount. Суммы по рецепту, делённые на число
+порций, предрассчитываются в колонки Recipe, чтобы вывод и фильтры
+вроде ?max_calories= не считали ничего на запрос.
+
+Если хотя бы у одного ингредиента рецепта нет значения, соответствующая
+колонка рецепта остаётся пустой: частичная сумма занижала бы результат.
+Пустой остаётся и сумма, не помещающаяся в колонку (ошибочные справочные
+данные или огромное количество), чтобы не сорвать сохранение рецепта.
+numpy импортируется только при пересчёте.
+"""
+import math
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (Count, DecimalField, ExpressionWrapper, F, Q,
+                              Sum)
+
+from foodgram.routers import PRIMARY_DB
+from .models import Ingredient, IngredientRecipe, Recipe
+
+# Поля Ingredient на базовую единицу и соответствующие им поля Recipe
+# на порцию.
+REFERENCE_FIELDS = ("calories", "proteins", "fats", "carbohydrates", "price")
+NUTRITION_FIELDS = ("calories", "proteins", "fats", "carbohydrates", "cost")
+PRECISION = Decimal("0.01")
+# Наибольшее по модулю значение, которое помещается в колонки Recipe.
+LIMITS = tuple(
+    Decimal(10) ** (field.max_digits - field.decimal_places) - PRECISION
+    for field in map(Recipe._meta.get_field, NUTRITION_FIELDS)
+)
+BATCH_SIZE = 1000
+
+
+def reference_values(ingredient):
+    return tuple(getattr(ingredient, name) for name in REFERENCE_FIELDS)
+
+
+def to_column(value, limit):
+    """float -> Decimal колонки Recipe или None, если значение неизвестно
+    или не помещается."""
+    if not math.isfinite(value) or abs(value) > limit:
+        return None
+    value = Decimal(repr(value)).quantize(PRECISION)
+    return value if abs(value) <= limit else None
+
+
+def rollup(rows, references, servings):
+    """Значения NUTRITION_FIELDS на порцию для пачки рецептов.
+
+    rows — (recipe_id, ingredient_id, base_amount), references —
+    ingredient_id -> значения REFERENCE_FIELDS, servings — recipe_id ->
+    число порций. Рецепт без ингредиентов или без справочных данных
+    получает None в соответствующих полях.
+    """
+    import numpy as np
+
+    recipe_ids = list(servings)
+    if not recipe_ids:
+        return {}
+    rows = list(rows)
+    recipe_index = {pk: index for index, pk in enumerate(recipe_ids)}
+    ingredient_index = {pk: index for index, pk in enumerate(references)}
+    # Неизвестное значение - NaN: он переходит в сумму всего рецепта.
+    matrix = np.array(
+        [
+            [np.nan if value is None else float(value) for value in values]
+            for values in references.values()
+        ],
+        dtype=float,
+    ).reshape(-1, len(REFERENCE_FIELDS))
+    recipes = np.fromiter(
+        (recipe_index[row[0]] for row in rows), dtype=np.intp,
+        count=len(rows))
+    ingredients = np.fromiter(
+        (ingredient_index[row[1]] for row in rows), dtype=np.intp,
+        count=len(rows))
+    amounts = np.fromiter(
+        (float(row[2]) for row in rows), dtype=float, count=len(rows))
+    contributions = matrix[ingredients] * amounts[:, np.newaxis]
+    totals = np.column_stack([
+        np.bincount(
+            recipes, weights=contributions[:, column],
+            minlength=len(recipe_ids))
+        for column in range(len(REFERENCE_FIELDS))
+    ])
+    totals /= np.array(
+        [servings[pk] for pk in recipe_ids], dtype=float)[:, np.newaxis]
+    totals[np.bincount(recipes, minlength=len(recipe_ids)) == 0] = np.nan
+    return {
+        pk: tuple(map(to_column, values, LIMITS))
+        for pk, values in zip(recipe_ids, totals.tolist())
+    }
+
+
+def refresh_nutrition(recipe_ids):
+    """Пересчитать колонки рецептов пачками по BATCH_SIZE."""
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        batch = recipe_ids[start:start + BATCH_SIZE]
+        servings = dict(
+            Recipe.objects.using(PRIMARY_DB).filter(id__in=batch)
+            .values_list("id", "servings")
+        )
+        rows = list(
+            IngredientRecipe.objects.using(PRIMARY_DB)
+            .filter(recipe_id__in=servings)
+            .values_list("recipe_id", "ingredient_id", "base_amount")
+        )
+        references = {
+            pk: values
+            for pk, *values in Ingredient.objects.using(PRIMARY_DB)
+            .filter(id__in={row[1] for row in rows})
+            .values_list("id", *REFERENCE_FIELDS)
+        }
+        values = rollup(rows, references, servings)
+        with transaction.atomic():
+            Recipe.objects.bulk_update(
+                [
+                    Recipe(id=pk, **dict(zip(NUTRITION_FIELDS, totals)))
+                    for pk, totals in values.items()
+                ],
+                NUTRITION_FIELDS,
+            )
+
+
+def nutrition_representation(values):
+    """Поля NUTRITION_FIELDS строками, как DecimalField в DRF."""
+    return {
+        name: None if value is None else f"{value:f}"
+        for name, value in zip(NUTRITION_FIELDS, values)
+    }
+
+
+def cart_totals(user):
+    """Суммы по рецептам корзины целиком (все порции) и число рецептов,
+    для которых данных нет."""
+    incomplete = Q()
+    for name in NUTRITION_FIELDS:
+        incomplete |= Q(**{f"{name}__isnull": True})
+    return Recipe.objects.filter(shopping_cart__user=user).aggregate(
+        incomplete=Count("id", filter=incomplete),
+        **{
+            name: Sum(ExpressionWrapper(
+                F(name) * F("servings"),
+                output_field=DecimalField(max_digits=24, decimal_places=2),
+            ))
+            for name in NUTRITION_FIELDS
+        },
+    )
+
+
+def cart_summary(totals):
+    """Итоговые строки списка покупок по результату cart_totals."""
+    value = {
+        name: None if totals[name] is None
+        else f"{totals[name].quantize(PRECISION):f}"
+        for name in NUTRITION_FIELDS
+    }
+    lines = ["", "", "Всего по рецептам корзины:"]
+    if value["calories"] is not None:
+        lines.append(f"- Калорийность: {value['calories']} ккал")
+    if None not in (value["proteins"], value["fats"],
+                    value["carbohydrates"]):
+        lines.append(
+            f"- Б/Ж/У: {value['proteins']} / {value['fats']} / "
+            f"{value['carbohydrates']} г")
+    if value["cost"] is not None:
+        lines.append(f"- Примерная стоимость: {value['cost']} ₽")
+    if totals["incomplete"]:
+        lines.append(
+            "- Без учёта рецептов с неполными данными: "
+            f"{totals['incomplete']}")
+    return "\n".join(lines)
@@ -0,0 +1,138 @@
+from django.db import NotSupportedError
+from django.db.migrations.operations import AddConstraint, AddIndex
+from django.db.migrations.operations.base import Operation
+from django.db.models import Index
+
+
+def concurrently(schema_editor):
+    """{"concurrently": True} для PostgreSQL вне транзакции, иначе {}."""
+    if schema_editor.connection.vendor != "postgresql":
+        return {}
+    if schema_editor.connection.in_atomic_block:
+        raise NotSupportedError(
+            "Операцию CONCURRENTLY нельзя выполнить в транзакции, "
+            "объявите atomic = False в миграции."
+        )
+    return {"concurrently": True}
+
+
+class AddIndexConcurrently(AddIndex):
+    """CREATE INDEX CONCURRENTLY на PostgreSQL, обычный индекс на прочих СУБД.
+
+    Миграция с этой операцией должна быть объявлена с atomic = False.
+    """
+
+    atomic = False
+
+    def describe(self):
+        return "Concurrently " + super().describe()
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(
+                model, self.index, **concurrently(schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(
+                model, self.index, **concurrently(schema_editor))
+
+
+class AddUniqueConstraintConcurrently(AddConstraint):
+    """UNIQUE-ограничение по полям без долгой блокировки таблицы.
+
+    На PostgreSQL уникальный индекс строится CREATE UNIQUE INDEX
+    CONCURRENTLY, затем становится ограничением через ADD CONSTRAINT ...
+    USING INDEX - без повторной проверки строк. На прочих СУБД это
+    обычный AddConstraint. Миграция должна быть объявлена с atomic = False.
+    """
+
+    atomic = False
+
+    def describe(self):
+        return "Concurrently " + super().describe()
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not concurrently(schema_editor):
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state)
+        if not self.allow_migrate_model(
+                schema_editor.connection.alias, model):
+            return
+        quote = schema_editor.quote_name
+        table = quote(model._meta.db_table)
+        name = quote(self.constraint.name)
+        columns = ", ".join(
+            quote(model._meta.get_field(field).column)
+            for field in self.constraint.fields
+        )
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({columns})")
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+            f"UNIQUE USING INDEX {name}")
+
+
+class RemoveFieldIndexConcurrently(Operation):
+    """DROP INDEX CONCURRENTLY для индекса db_index поля.
+
+    Меняет только БД: состояние меняет AlterField(db_index=False) в той же
+    SeparateDatabaseAndState. Миграция должна быть объявлена с
+    atomic = False.
+    """
+
+    atomic = False
+    reduces_to_sql = False
+
+    def __init__(self, model_name, name):
+        self.model_name = model_name
+        self.name = name
+
+    def deconstruct(self):
+        return (
+            self.__class__.__name__,
+            [],
+            {"model_name": self.model_name, "name": self.name},
+        )
+
+    def describe(self):
+        return (
+            f"Concurrently remove index of {self.model_name}.{self.name}")
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(
+                schema_editor.connection.alias, model):
+            return
+        field = model._meta.get_field(self.name)
+        names = schema_editor._constraint_names(
+            model, [field.column], index=True, unique=False,
+            type_=Index.suffix)
+        for name in names:
+            if concurrently(schema_editor):
+                schema_editor.execute(
+                    "DROP INDEX CONCURRENTLY IF EXISTS "
+                    f"{schema_editor.quote_name(name)}")
+            else:
+                schema_editor.execute(
+                    schema_editor._delete_index_sql(model, name))
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(
+                schema_editor.connection.alias, model):
+            return
+        field = model._meta.get_field(self.name)
+        schema_editor.execute(schema_editor._create_index_sql(
+            model, fields=[field], **concurrently(schema_editor)))
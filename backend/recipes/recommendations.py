@@ -0,0 +1,182 @@
+"""Офлайн-расчёт похожих рецептов.
+
+Близость двух рецептов - взвешенная сумма косинусных мер по двум
+разреженным матрицам: рецепт x пользователь (совместное добавление в
+избранное) и рецепт x ингредиент с весами IDF, чтобы соль и вода не
+делали похожими все рецепты. Для каждого рецепта в RecipeSimilarity
+хранятся top-K соседей, поэтому выдача - чтение по индексу.
+"""
+from array import array
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Favourite, IngredientRecipe, Recipe, RecipeSimilarity
+
+BATCH_SIZE = 5000
+
+
+def incidence_matrix(pairs, index):
+    """Бинарная матрица рецепт x объект из пар (recipe_id, object_id)."""
+    rows, cols = array("q"), array("q")
+    columns = {}
+    for recipe_id, object_id in pairs.iterator(chunk_size=BATCH_SIZE):
+        row = index.get(recipe_id)
+        if row is not None:
+            rows.append(row)
+            cols.append(columns.setdefault(object_id, len(columns)))
+    return sparse.csr_matrix(
+        (
+            np.ones(len(rows), dtype=np.float32),
+            (np.frombuffer(rows, dtype=np.int64),
+             np.frombuffer(cols, dtype=np.int64)),
+        ),
+        shape=(len(index), max(len(columns), 1)),
+    )
+
+
+def idf_weighted(matrix):
+    frequency = np.asarray(matrix.sum(axis=0)).ravel()
+    idf = np.log(matrix.shape[0] / np.maximum(frequency, 1))
+    return (matrix @ sparse.diags(idf.astype(np.float32))).tocsr()
+
+
+def row_normalized(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    scale = np.divide(
+        1, norms, out=np.zeros_like(norms), where=norms > 0)
+    return (sparse.diags(scale.astype(np.float32)) @ matrix).tocsr()
+
+
+class SimilarityModel:
+    """Нормированные матрицы всех рецептов для расчёта соседей."""
+
+    def __init__(self, weight=None):
+        self.weight = (
+            settings.RECOMMENDATIONS_FAVOURITE_WEIGHT
+            if weight is None else weight)
+        self.recipe_ids = np.fromiter(
+            Recipe.objects.order_by("id").values_list("id", flat=True),
+            dtype=np.int64,
+        )
+        index = {int(pk): row for row, pk in enumerate(self.recipe_ids)}
+        self.index = index
+        self.favourites = row_normalized(incidence_matrix(
+            Favourite.objects.values_list("recipe_id", "user_id"), index))
+        self.ingredients = row_normalized(idf_weighted(incidence_matrix(
+            IngredientRecipe.objects.values_list(
+                "recipe_id", "ingredient_id"),
+            index,
+        )))
+
+    def similarities(self, rows):
+        """Разреженная матрица близости рецептов rows ко всем рецептам."""
+        favourites = self.favourites[rows]
+        ingredients = self.ingredients[rows]
+        return (
+            self.weight * (favourites @ self.favourites.T)
+            + (1 - self.weight) * (ingredients @ self.ingredients.T)
+        ).tocsr()
+
+    def neighbours(self, recipe_ids, top_k, block_size):
+        """(recipe_id, [(similar_id, score), ...]) по убыванию близости."""
+        rows = [self.index[pk] for pk in recipe_ids if pk in self.index]
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            matrix = self.similarities(block)
+            for offset, row in enumerate(block):
+                begin, end = matrix.indptr[offset], matrix.indptr[offset + 1]
+                columns = matrix.indices[begin:end]
+                scores = matrix.data[begin:end]
+                keep = (columns != row) & (scores > 0)
+                columns, scores = columns[keep], scores[keep]
+                if len(scores) > top_k:
+                    top = np.argpartition(-scores, top_k)[:top_k]
+                    columns, scores = columns[top], scores[top]
+                order = np.argsort(-scores, kind="stable")
+                yield int(self.recipe_ids[row]), [
+                    (int(self.recipe_ids[column]), float(score))
+                    for column, score in zip(columns[order], scores[order])
+                ]
+
+
+def replace_neighbours(neighbours):
+    """Заменить сохранённых соседей переданных рецептов.
+
+    Рецепты помечаются рассчитанными, в том числе без единого соседа:
+    иначе build_new считал бы их новыми при каждом запуске.
+    """
+    neighbours = dict(neighbours)
+    with transaction.atomic():
+        Recipe.objects.filter(id__in=neighbours).update(
+            similar_built_at=timezone.now())
+        RecipeSimilarity.objects.filter(recipe_id__in=neighbours).delete()
+        RecipeSimilarity.objects.bulk_create(
+            [
+                RecipeSimilarity(
+                    recipe_id=recipe_id, similar_id=similar_id, score=score)
+                for recipe_id, items in neighbours.items()
+                for similar_id, score in items
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def build_all(top_k, block_size):
+    """Полный пересчёт соседей всех рецептов. Возвращает их число."""
+    model = SimilarityModel()
+    count = 0
+    batch = []
+    for item in model.neighbours(model.recipe_ids, top_k, block_size):
+        batch.append(item)
+        if len(batch) >= block_size:
+            replace_neighbours(batch)
+            count += len(batch)
+            batch = []
+    replace_neighbours(batch)
+    RecipeSimilarity.objects.exclude(
+        recipe_id__in=Recipe.objects.values("id")).delete()
+    return count + len(batch)
+
+
+def build_new(top_k, block_size):
+    """Дорасчёт для рецептов, соседи которых ещё не рассчитывались.
+
+    Новый рецепт также попадает в списки своих соседей, если вытесняет
+    их худшего соседа. Это приближение: полный пересчёт учитывает и
+    новые добавления в избранное.
+    """
+    new_ids = list(
+        Recipe.objects.filter(similar_built_at=None, similar__isnull=True)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    if not new_ids:
+        return 0
+    model = SimilarityModel()
+    fresh = dict(model.neighbours(new_ids, top_k, block_size))
+    replace_neighbours(fresh)
+    candidates = {}
+    for recipe_id, items in fresh.items():
+        for similar_id, score in items:
+            if similar_id not in fresh:
+                candidates.setdefault(similar_id, []).append(
+                    (recipe_id, score))
+    affected = list(candidates)
+    for start in range(0, len(affected), BATCH_SIZE):
+        chunk = affected[start:start + BATCH_SIZE]
+        current = {pk: [] for pk in chunk}
+        for recipe_id, similar_id, score in RecipeSimilarity.objects.filter(
+                recipe_id__in=chunk).values_list(
+                    "recipe_id", "similar_id", "score"):
+            current[recipe_id].append((similar_id, score))
+        replace_neighbours(
+            (pk, sorted(
+                current[pk] + candidates[pk], key=lambda item: -item[1]
+            )[:top_k])
+            for pk in chunk
+        )
+    return len(fresh)
@@ -0,0 +1,62 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+
+from foodgram.routers import PRIMARY_DB
+from monitoring.metrics import cache_lookup
+from .models import Tag
+
+VERSION_CACHE_KEY = "tag-registry:version"
+TAG_FIELDS = ("id", "name", "color", "slug")
+
+
+class TagRegistry:
+    """Все теги в памяти процесса.
+
+    Теги перечитываются из основной БД, только когда меняется версия в
+    общем кэше; версию сбрасывают сигналы сохранения и удаления Tag.
+    Возвращаемые словари общие для всех запросов и не должны изменяться.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._tags = {}
+
+    def tags(self):
+        """Словарь id -> тег в формате TagSerializer."""
+        version = cache.get_or_set(VERSION_CACHE_KEY, new_version, None)
+        cache_lookup("tag_registry", version == self._version)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._tags = {
+                        tag["id"]: tag
+                        for tag in Tag.objects.using(PRIMARY_DB)
+                        .order_by("id").values(*TAG_FIELDS)
+                    }
+                    self._version = version
+        return self._tags
+
+    def ids(self):
+        return self.tags().keys()
+
+    def resolve(self, tag_ids):
+        """Теги по списку id в том же порядке, неизвестные пропускаются."""
+        tags = self.tags()
+        return [tags[pk] for pk in tag_ids if pk in tags]
+
+    def list(self):
+        return list(self.tags().values())
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def bump_version():
+    cache.set(VERSION_CACHE_KEY, new_version(), None)
+
+
+tag_registry = TagRegistry()
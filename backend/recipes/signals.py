@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from foodgram.routers import PRIMARY_DB
+from tasks.queue import enqueue
+from .models import Ingredient, Tag
+from .nutrition import REFERENCE_FIELDS, refresh_nutrition
+from .registry import bump_version
+from .snapshots import recipes_with_ingredient, refresh_snapshots
+from .tasks import refresh_ingredient
+
+# Поля ингредиента, от которых зависят данные рецептов: снимок, базовые
+# единицы и пищевая ценность.
+TRACKED_FIELDS = ("name", "measurement_unit", *REFERENCE_FIELDS)
+
+
+@receiver(pre_save, sender=Ingredient)
+def ingredient_saving(sender, instance, update_fields=None, **kwargs):
+    fields = [
+        name for name in TRACKED_FIELDS
+        if update_fields is None or name in update_fields
+    ]
+    instance._tracked_values = None
+    if instance.pk is None or not fields:
+        return
+    instance._tracked_values = (
+        Ingredient.objects.using(PRIMARY_DB).filter(pk=instance.pk)
+        .values(*fields).first()
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    old = getattr(instance, "_tracked_values", None)
+    if created or not old:
+        return
+    changed = [
+        name for name, value in old.items()
+        if getattr(instance, name) != value
+    ]
+    # Ингредиент может входить в сотни тысяч рецептов: пересборка идёт
+    # в фоне, после коммита.
+    if changed:
+        enqueue(refresh_ingredient, instance.pk, changed)
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleting(sender, instance, **kwargs):
+    instance._snapshot_recipe_ids = list(
+        recipes_with_ingredient(instance.pk))
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    recipe_ids = getattr(instance, "_snapshot_recipe_ids", ())
+    refresh_snapshots(recipe_ids)
+    refresh_nutrition(recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, **kwargs):
+    transaction.on_commit(bump_version)
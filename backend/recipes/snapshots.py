@@ -0,0 +1,65 @@
+"""Денормализованный снимок ингредиентов рецепта.
+
+Recipe.ingredients_snapshot хранит список [id, name, measurement_unit,
+amount] в порядке добавления. Массивы, а не объекты: jsonb не сохраняет
+порядок ключей, а ответ API должен совпадать побайтно.
+"""
+from django.db import transaction
+
+from .models import IngredientRecipe, Recipe
+
+BATCH_SIZE = 1000
+
+
+def snapshot_item(ingredient, amount):
+    return [
+        ingredient.id, ingredient.name, ingredient.measurement_unit, amount]
+
+
+def snapshot_to_representation(snapshot):
+    return [
+        {
+            "id": pk,
+            "name": name,
+            "measurement_unit": measurement_unit,
+            "amount": amount,
+        }
+        for pk, name, measurement_unit, amount in snapshot
+    ]
+
+
+def build_snapshots(recipe_ids):
+    """recipe_id -> снимок по данным IngredientRecipe одним запросом."""
+    snapshots = {recipe_id: [] for recipe_id in recipe_ids}
+    rows = IngredientRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by("id").values_list(
+        "recipe_id",
+        "ingredient_id",
+        "ingredient__name",
+        "ingredient__measurement_unit",
+        "amount",
+    )
+    for recipe_id, *item in rows:
+        snapshots[recipe_id].append(item)
+    return snapshots
+
+
+def refresh_snapshots(recipe_ids):
+    """Пересобрать снимки рецептов пачками по BATCH_SIZE."""
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        snapshots = build_snapshots(recipe_ids[start:start + BATCH_SIZE])
+        with transaction.atomic():
+            Recipe.objects.bulk_update(
+                [
+                    Recipe(id=recipe_id, ingredients_snapshot=snapshot)
+                    for recipe_id, snapshot in snapshots.items()
+                ],
+                ["ingredients_snapshot"],
+            )
+
+
+def recipes_with_ingredient(ingredient_id):
+    return IngredientRecipe.objects.filter(
+        ingredient_id=ingredient_id).values_list("recipe_id", flat=True)
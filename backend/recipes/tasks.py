@@ -0,0 +1,44 @@
+from foodgram.routers import pin_to_primary, unpin
+from tasks.queue import task
+from .feeds import fan_out
+from .models import IngredientRecipe
+from .nutrition import REFERENCE_FIELDS, refresh_nutrition
+from .snapshots import recipes_with_ingredient, refresh_snapshots
+from .units import normalize_queryset
+
+
+@task
+def fan_out_recipe(recipe_id, author_id):
+    """Разложить рецепт по лентам подписчиков.
+
+    Подписчики читаются из основной БД: на реплике может ещё не быть
+    только что оформленной подписки.
+    """
+    token = pin_to_primary()
+    try:
+        fan_out(recipe_id, author_id)
+    finally:
+        unpin(token)
+
+
+@task
+def refresh_ingredient(ingredient_id, changed):
+    """Обновить данные рецептов после изменения полей changed ингредиента.
+
+    Базовые единицы пересчитываются до пищевой ценности, которая от них
+    зависит. Чтение идёт из основной БД: реплика может ещё не видеть
+    изменения.
+    """
+    changed = set(changed)
+    token = pin_to_primary()
+    try:
+        if "measurement_unit" in changed:
+            normalize_queryset(
+                IngredientRecipe.objects.filter(ingredient_id=ingredient_id))
+        recipe_ids = list(recipes_with_ingredient(ingredient_id))
+        if changed & {"name", "measurement_unit"}:
+            refresh_snapshots(recipe_ids)
+        if changed & {"measurement_unit", *REFERENCE_FIELDS}:
+            refresh_nutrition(recipe_ids)
+    finally:
+        unpin(token)
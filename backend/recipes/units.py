@@ -0,0 +1,76 @@
+"""Приведение единиц измерения ингредиентов к базовым.
+
+Количество в рецепте хранится в единице ингредиента и дополнительно в
+базовой единице (IngredientRecipe.base_unit, base_amount), чтобы список
+покупок суммировал одно и то же в разных единицах одним SUM.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+
+# единица -> (базовая единица, множитель)
+CONVERSIONS = {
+    "мг": ("г", Decimal("0.001")),
+    "г": ("г", Decimal(1)),
+    "кг": ("г", Decimal(1000)),
+    "мл": ("мл", Decimal(1)),
+    "л": ("мл", Decimal(1000)),
+    "капля": ("мл", Decimal("0.05")),
+    "ч. л.": ("мл", Decimal(5)),
+    "ст. л.": ("мл", Decimal(15)),
+    "стакан": ("мл", Decimal(250)),
+    "шт": ("шт.", Decimal(1)),
+    "шт.": ("шт.", Decimal(1)),
+}
+
+# базовая единица -> [(порог, единица вывода, делитель)] по убыванию
+DISPLAY_UNITS = {
+    "г": [(Decimal(1000), "кг", Decimal(1000))],
+    "мл": [(Decimal(1000), "л", Decimal(1000))],
+}
+
+AMOUNT_PRECISION = Decimal("0.001")
+
+
+def conversion(unit):
+    """(базовая единица, множитель); неизвестные единицы («по вкусу»,
+    «щепотка») остаются как есть."""
+    unit = unit.strip()
+    return CONVERSIONS.get(unit.lower(), (unit, Decimal(1)))
+
+
+def to_base(unit, amount):
+    base_unit, factor = conversion(unit)
+    return base_unit, amount * factor
+
+
+def base_amount_expression(factor):
+    return ExpressionWrapper(
+        F("amount") * Value(factor),
+        output_field=DecimalField(max_digits=12, decimal_places=3),
+    )
+
+
+def normalize_queryset(queryset):
+    """Пересчитать базовые единицы строк IngredientRecipe: по одному
+    UPDATE на каждую встречающуюся единицу ингредиента."""
+    units = queryset.order_by().values_list(
+        "ingredient__measurement_unit", flat=True).distinct()
+    for unit in list(units):
+        base_unit, factor = conversion(unit)
+        queryset.filter(ingredient__measurement_unit=unit).update(
+            base_unit=base_unit, base_amount=base_amount_expression(factor))
+
+
+def format_amount(value):
+    value = Decimal(value).quantize(AMOUNT_PRECISION).normalize()
+    return f"{value:f}"
+
+
+def display(base_unit, amount):
+    """Количество в наиболее удобной единице: 1500 г -> 1.5 кг."""
+    amount = Decimal(amount)
+    for threshold, unit, divisor in DISPLAY_UNITS.get(base_unit, ()):
+        if amount >= threshold:
+            return format_amount(amount / divisor), unit
+    return format_amount(amount), base_unit
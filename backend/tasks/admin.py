@@ -0,0 +1,16 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "run_at", "created")
+    list_filter = ("status", "name")
+    readonly_fields = ("last_error",)
+    actions = ("retry",)
+
+    @admin.action(description="Повторить выбранные задачи")
+    def retry(self, request, queryset):
+        queryset.update(status=Task.PENDING, attempts=0, run_at=timezone.now())
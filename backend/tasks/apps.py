@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.core import checks
+
+
+class TasksConfig(AppConfig):
+    name = "tasks"
+
+    def ready(self):
+        from .checks import check_shared_cache
+
+        checks.register(check_shared_cache, checks.Tags.caches)
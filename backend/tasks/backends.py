@@ -0,0 +1,103 @@
+import logging
+import queue
+import threading
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import metrics
+from .models import Task
+from .queue import run_task
+
+logger = logging.getLogger(__name__)
+
+
+def execute(task):
+    """Выполнить задачу из БД: удалить при успехе, иначе отложить повтор
+    или пометить проваленной."""
+    try:
+        run_task(task.name, task.args, task.kwargs)
+    except Exception:
+        logger.exception("Задача %s завершилась ошибкой", task)
+        task.retry_or_fail(traceback.format_exc())
+        metrics.record("failed" if task.status == Task.FAILED else "retried")
+        return False
+    task.delete()
+    metrics.record("done")
+    return True
+
+
+class DatabaseBackend:
+    """Очередь в таблице Task, её разбирает команда run_tasks."""
+
+    # Задачи выполняет другой процесс: записи в кэш должны быть видны
+    # веб-воркерам (см. tasks/checks.py).
+    out_of_process = True
+
+    def enqueue(self, name, args, kwargs):
+        Task.objects.create(name=name, args=list(args), kwargs=kwargs or {})
+
+
+class ImmediateBackend:
+    """Выполнение задачи сразу в вызывающем потоке (тесты, отладка)."""
+
+    out_of_process = False
+
+    def enqueue(self, name, args, kwargs):
+        run_task(name, args, kwargs)
+
+
+class LocalQueueBackend:
+    """Очередь в памяти процесса, которую разбирает фоновый поток.
+
+    Задачи теряются при перезапуске процесса, поэтому годится для
+    необязательных побочных эффектов и для разработки без воркера.
+    """
+
+    out_of_process = False
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enqueue(self, name, args, kwargs, attempt=1):
+        self._ensure_worker()
+        self.queue.put((name, args, kwargs, attempt))
+
+    def join(self):
+        """Дождаться выполнения всех поставленных задач."""
+        self.queue.join()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._work, name="tasks-local", daemon=True)
+                self._thread.start()
+
+    def _work(self):
+        while True:
+            name, args, kwargs, attempt = self.queue.get()
+            close_old_connections()
+            try:
+                run_task(name, args, kwargs)
+                metrics.record("done")
+            except Exception:
+                logger.exception("Задача %s завершилась ошибкой", name)
+                self._retry(name, args, kwargs, attempt)
+            finally:
+                close_old_connections()
+                self.queue.task_done()
+
+    def _retry(self, name, args, kwargs, attempt):
+        if attempt >= settings.TASKS_MAX_ATTEMPTS:
+            metrics.record("failed")
+            return
+        metrics.record("retried")
+        timer = threading.Timer(
+            settings.TASKS_RETRY_DELAY * 2 ** (attempt - 1),
+            self.enqueue, (name, args, kwargs, attempt + 1))
+        timer.daemon = True
+        timer.start()
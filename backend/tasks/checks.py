@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+from django.utils.module_loading import import_string
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Задачи из другого процесса пишут ленты и счётчики в общий кэш.
+
+    С LocMemCache записи воркера run_tasks не видны веб-воркерам: ленты
+    не обновляются до истечения FEED_CACHE_TTL, а task_stats и /metrics
+    не видят выполненных задач.
+    """
+    backend = import_string(settings.TASKS_BACKEND)
+    if getattr(backend, "out_of_process", True) and isinstance(
+            caches["default"], LocMemCache):
+        return [Error(
+            f"{settings.TASKS_BACKEND} выполняет задачи в другом процессе, "
+            "а LocMemCache не разделяется между процессами.",
+            hint="Укажите общий кэш (CACHE_BACKEND=django.core.cache."
+                 "backends.memcached.PyMemcacheCache и CACHE_LOCATION) или "
+                 "TASKS_BACKEND=tasks.backends.LocalQueueBackend.",
+            id="tasks.E001",
+        )]
+    return []
@@ -0,0 +1,53 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.backends import execute
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = "Воркер очереди задач в БД."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch", type=int, default=10,
+            help="Сколько задач забирать за раз")
+        parser.add_argument(
+            "--sleep", type=float, default=1.0,
+            help="Пауза в секундах, когда очередь пуста")
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Выполнить готовые задачи и выйти")
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        done = failed = 0
+        started = time.monotonic()
+        while not self.stopping:
+            close_old_connections()
+            tasks = Task.objects.claim(
+                options["batch"], settings.TASKS_LEASE_SECONDS)
+            if not tasks:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+            for task in tasks:
+                if execute(task):
+                    done += 1
+                else:
+                    failed += 1
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Выполнено: {done}, с ошибкой: {failed}, "
+            f"{done / elapsed if elapsed else 0:.1f} задач/с"
+        )
+
+    def stop(self, signum, frame):
+        self.stopping = True
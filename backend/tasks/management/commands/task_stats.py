@@ -0,0 +1,20 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from tasks import metrics
+
+
+class Command(BaseCommand):
+    help = "Глубина очереди задач и пропускная способность воркеров."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes", type=int, default=5,
+            help="Окно пропускной способности в минутах")
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps({
+            "depth": metrics.queue_depth(),
+            "throughput": metrics.throughput(options["minutes"]),
+        }))
@@ -0,0 +1,54 @@
+"""Метрики очереди задач.
+
+Глубина очереди считается по таблице Task, пропускная способность - по
+поминутным счётчикам исходов в общем кэше, которые пишут все воркеры.
+"""
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Task
+
+OUTCOMES = ("done", "retried", "failed")
+COUNTER_TTL = 60 * 60
+
+
+def counter_key(outcome, minute):
+    return f"tasks:{outcome}:{minute}"
+
+
+def record(outcome):
+    key = counter_key(outcome, int(time.time() // 60))
+    cache.add(key, 0, COUNTER_TTL)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснен между add и incr.
+        cache.set(key, 1, COUNTER_TTL)
+
+
+def throughput(minutes=5):
+    """Число задач по исходам за последние minutes минут, включая
+    текущую."""
+    current = int(time.time() // 60)
+    window = range(current - minutes + 1, current + 1)
+    values = cache.get_many(
+        [counter_key(outcome, minute)
+         for outcome in OUTCOMES for minute in window])
+    return {
+        outcome: sum(
+            values.get(counter_key(outcome, minute), 0)
+            for minute in window)
+        for outcome in OUTCOMES
+    }
+
+
+def queue_depth():
+    now = timezone.now()
+    return Task.objects.aggregate(
+        ready=Count("id", filter=Q(status=Task.PENDING, run_at__lte=now)),
+        delayed=Count("id", filter=Q(status=Task.PENDING, run_at__gt=now)),
+        failed=Count("id", filter=Q(status=Task.FAILED)),
+    )
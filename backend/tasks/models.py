@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+
+class TaskQuerySet(models.QuerySet):
+    def ready(self, now):
+        return self.filter(status=Task.PENDING, run_at__lte=now)
+
+    def claim(self, limit, lease):
+        """Забрать до limit готовых задач и скрыть их от других
+        воркеров на время lease (секунды).
+
+        Если воркер упадёт, задачи снова станут видны после аренды.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            tasks = list(
+                self.select_for_update(skip_locked=True)
+                .ready(now).order_by("run_at")[:limit]
+            )
+            if tasks:
+                self.filter(id__in=[task.id for task in tasks]).update(
+                    run_at=now + timedelta(seconds=lease),
+                    attempts=models.F("attempts") + 1,
+                )
+        for task in tasks:
+            task.attempts += 1
+        return tasks
+
+
+class Task(models.Model):
+    """Отложенная задача в очереди на базе БД."""
+
+    PENDING = "pending"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "В очереди"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField("Задача", max_length=200)
+    args = models.JSONField("Аргументы", default=list)
+    kwargs = models.JSONField("Именованные аргументы", default=dict)
+    status = models.CharField(
+        "Статус", max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField("Попытки", default=0)
+    run_at = models.DateTimeField("Выполнить после", default=timezone.now)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created = models.DateTimeField("Создана", auto_now_add=True)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("run_at",)
+        indexes = [
+            models.Index(
+                fields=["status", "run_at"], name="task_status_run_at_idx"),
+        ]
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
+
+    def retry_or_fail(self, error):
+        """Отложить повтор с экспоненциальной задержкой или пометить
+        задачу проваленной после TASKS_MAX_ATTEMPTS попыток."""
+        self.last_error = error
+        if self.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            self.status = self.FAILED
+        else:
+            self.run_at = timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY * 2 ** (self.attempts - 1))
+        self.save(update_fields=["status", "run_at", "last_error"])
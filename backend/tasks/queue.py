@@ -0,0 +1,41 @@
+"""Регистрация и постановка фоновых задач.
+
+Задача - обычная функция модуля с декоратором @task. В очередь кладутся
+имя задачи и аргументы (JSON), поэтому аргументы должны быть простыми
+значениями (id, строки, числа), а не объектами моделей. Задача ставится
+после фиксации текущей транзакции и при её откате не ставится.
+"""
+from functools import lru_cache, partial
+from importlib import import_module
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+_registry = {}
+
+
+def task(func):
+    func.task_name = f"{func.__module__}.{func.__name__}"
+    _registry[func.task_name] = func
+    return func
+
+
+def get_task(name):
+    if name not in _registry:
+        import_module(name.rsplit(".", 1)[0])
+    return _registry[name]
+
+
+def run_task(name, args=(), kwargs=None):
+    return get_task(name)(*args, **(kwargs or {}))
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.TASKS_BACKEND)()
+
+
+def enqueue(func, *args, **kwargs):
+    transaction.on_commit(
+        partial(get_backend().enqueue, func.task_name, args, kwargs))
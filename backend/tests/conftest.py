@@ -0,0 +1,80 @@
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from tasks.queue import get_backend
+from users.models import User
+
+REPLICA = "replica1"
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(
+        django_db_modify_db_settings_parallel_suffix, tmp_path_factory):
+    # Общая память SQLite в параллельных запросах сразу отвечает
+    # "database table is locked"; с файлом запись ждёт блокировку.
+    database = settings.DATABASES["default"]
+    if database["ENGINE"] == "django.db.backends.sqlite3":
+        database.setdefault("TEST", {})["NAME"] = str(
+            tmp_path_factory.mktemp("db") / "test.sqlite3")
+    # Реплика для тестов роутера: отдельное подключение к той же тестовой
+    # базе. Роутер её не использует, пока DATABASE_REPLICAS пуст.
+    settings.DATABASES.setdefault(REPLICA, {
+        **database, "TEST": {**database.get("TEST", {}), "MIRROR": "default"},
+    })
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Счётчики ограничений и токены не должны переходить между тестами.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def replica(settings):
+    """Включить чтение с тестовой реплики, вернуть её alias."""
+    settings.DATABASE_REPLICAS = [REPLICA]
+    return REPLICA
+
+
+@pytest.fixture
+def local_queue(settings):
+    """Очередь задач в фоновом потоке процесса; join() ждёт задачи."""
+    settings.TASKS_BACKEND = "tasks.backends.LocalQueueBackend"
+    get_backend.cache_clear()
+    yield get_backend()
+    get_backend.cache_clear()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        email="user@example.com", username="user", first_name="Имя",
+        last_name="Фамилия", password="Sup3rS3cret!x")
+
+
+@pytest.fixture
+def author():
+    return User.objects.create_user(
+        email="author@example.com", username="author", first_name="Имя",
+        last_name="Фамилия", password="Sup3rS3cret!x")
+
+
+@pytest.fixture
+def recipe(author):
+    return Recipe.objects.create(
+        author=author, name="Рецепт", text="Описание", cooking_time=10,
+        image="recipes/image.png")
+
+
+@pytest.fixture
+def make_client():
+    def make(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+    return make
@@ -0,0 +1,44 @@
+import base64
+import io
+
+import pytest
+from django.conf import settings as django_settings
+from PIL import Image
+
+from users.avatars import rendition_name
+
+
+def image_data_url(width, height):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(output, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        output.getvalue()).decode()
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db(transaction=True)
+def test_avatar_is_stored_in_every_size(media, make_client, user):
+    client = make_client(user)
+
+    response = client.put(
+        "/api/users/me/avatar/", {"avatar": image_data_url(600, 300)},
+        format="json")
+    assert response.status_code == 200
+    user.refresh_from_db()
+    names = {
+        size: user.avatar.name if size == max(django_settings.AVATAR_SIZES)
+        else rendition_name(user.avatar.name, size)
+        for size in django_settings.AVATAR_SIZES
+    }
+    for size, name in names.items():
+        with Image.open(media / name) as image:
+            assert image.size == (size, size // 2)
+
+    response = client.delete("/api/users/me/avatar/")
+    assert response.status_code == 204
+    assert not any((media / name).exists() for name in names.values())
@@ -0,0 +1,87 @@
+import gzip
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from recipes.dataset import columns, dataset_models, read_manifest
+from recipes.models import (Favourite, Ingredient, IngredientRecipe,
+                            ShoppingCart, Tag)
+from users.models import Subscribe
+
+
+@pytest.fixture
+def filled(user, author, recipe):
+    tags = [
+        Tag.objects.create(name=name, color=color, slug=slug)
+        for name, color, slug in (
+            ("Завтрак", "#E26C2D", "breakfast"), ("Обед", "#49B64E", "lunch"))
+    ]
+    recipe.tags.set(tags)
+    for name in ("мука", "сахар", "соль"):
+        IngredientRecipe.objects.create(
+            recipe=recipe, amount=100,
+            ingredient=Ingredient.objects.create(
+                name=name, measurement_unit="г"))
+    Favourite.objects.create(user=user, recipe=recipe)
+    ShoppingCart.objects.create(user=user, recipe=recipe)
+    Subscribe.objects.create(user=user, author=author)
+
+
+def dataset_state():
+    """Все строки выгружаемых таблиц, включая связи many-to-many."""
+    return {
+        model._meta.label: sorted(
+            model._base_manager.order_by("pk").values_list(*columns(model)))
+        for model in dataset_models()
+    }
+
+
+def export(path):
+    # Чанки по две строки: таблицы выгружаются несколькими файлами.
+    call_command(
+        "export_dataset", str(path), "--chunk-size", "2", stdout=StringIO())
+
+
+def load(path, *args):
+    call_command("import_dataset", str(path), *args, stdout=StringIO())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_import_round_trip(filled, tmp_path):
+    export(tmp_path)
+    before = dataset_state()
+    call_command("flush", interactive=False)
+    assert not any(dataset_state().values())
+
+    load(tmp_path)
+
+    assert dataset_state() == before
+    assert len(before["recipes.Recipe_tags"]) == 2
+    assert len(before["recipes.IngredientRecipe"]) == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_needs_truncate_for_filled_tables(filled, tmp_path):
+    export(tmp_path)
+    before = dataset_state()
+
+    with pytest.raises(CommandError, match="Таблицы не пусты"):
+        load(tmp_path)
+
+    load(tmp_path, "--truncate")
+    assert dataset_state() == before
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_rejects_corrupted_chunk(filled, tmp_path):
+    export(tmp_path)
+    chunk = read_manifest(tmp_path)["tables"][0]["chunks"][0]
+    with open(os.path.join(tmp_path, chunk["file"]), "wb") as file:
+        file.write(gzip.compress(b'{"id": []}'))
+    call_command("flush", interactive=False)
+
+    with pytest.raises(CommandError, match="Контрольная сумма"):
+        load(tmp_path)
+    assert not any(dataset_state().values())
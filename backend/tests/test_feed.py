@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+
+from recipes.feeds import feed_cache_key, feed_page, push_to_feeds
+from recipes.models import Recipe
+from recipes.tasks import fan_out_recipe
+from tasks.queue import enqueue
+from users.models import Subscribe, User
+
+
+def make_user(name):
+    return User.objects.create_user(
+        email=f"{name}@example.com", username=name, first_name="Имя",
+        last_name="Фамилия", password="Sup3rS3cret!x")
+
+
+def make_recipe(author, name="Рецепт"):
+    return Recipe.objects.create(
+        author=author, name=name, text="Описание", cooking_time=10,
+        image="recipes/image.png")
+
+
+@pytest.mark.django_db
+def test_feed_merges_pushed_and_pulled_authors(settings, user, author):
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 1
+    popular = make_user("popular")
+    Subscribe.objects.create(user=user, author=author)
+    Subscribe.objects.create(user=user, author=popular)
+    Subscribe.objects.create(user=make_user("fan"), author=popular)
+    ids = [
+        make_recipe(owner).pk for owner in (author, popular, author, popular)]
+    make_recipe(make_user("other"))
+
+    page, has_more = feed_page(user.pk, None, 10)
+
+    assert page == ids[::-1]
+    assert not has_more
+    assert cache.get(feed_cache_key(user.pk)) == [ids[2], ids[0]]
+
+
+@pytest.mark.django_db
+def test_feed_cursor_pages_through_all_recipes(
+        user, author, make_client):
+    Subscribe.objects.create(user=user, author=author)
+    ids = [make_recipe(author).pk for _ in range(5)][::-1]
+    client = make_client(user)
+
+    seen = []
+    url = "/api/recipes/feed/?limit=2"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        seen += [item["id"] for item in response.data["results"]]
+        url = response.data["next"]
+
+    assert seen == ids
+    response = client.get(f"/api/recipes/feed/?limit=2&cursor={ids[1]}")
+    assert [item["id"] for item in response.data["results"]] == ids[2:4]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fan_out_pushes_new_recipe_into_cached_feed(
+        local_queue, user, author):
+    Subscribe.objects.create(user=user, author=author)
+    old = make_recipe(author)
+    assert feed_page(user.pk, None, 10) == ([old.pk], False)
+
+    new = make_recipe(author)
+    enqueue(fan_out_recipe, new.pk, author.pk)
+    local_queue.join()
+
+    assert cache.get(feed_cache_key(user.pk)) == [new.pk, old.pk]
+    assert feed_page(user.pk, None, 10) == ([new.pk, old.pk], False)
+
+
+def test_concurrent_pushes_keep_every_recipe(monkeypatch):
+    # Задержка после чтения ленты расширяет окно гонки между потоками.
+    def slow(method):
+        def wrapper(*args, **kwargs):
+            result = method(*args, **kwargs)
+            time.sleep(0.01)
+            return result
+        return wrapper
+
+    for name in ("get", "get_many"):
+        monkeypatch.setattr(
+            LocMemCache, name, slow(getattr(LocMemCache, name)))
+    cache.set(feed_cache_key(1), [1])
+    recipe_ids = range(2, 10)
+    barrier = threading.Barrier(len(recipe_ids))
+
+    def worker(recipe_id):
+        barrier.wait()
+        try:
+            push_to_feeds([1], recipe_id)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(pk,)) for pk in recipe_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.get(feed_cache_key(1)) == list(range(9, 0, -1))
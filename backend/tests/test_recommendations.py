@@ -0,0 +1,61 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import (Favourite, Ingredient, IngredientRecipe, Recipe,
+                            RecipeSimilarity)
+from recipes.recommendations import build_new
+
+
+@pytest.fixture
+def recipes(author):
+    """Рецепты a и b с общими ингредиентами и рецепт c без общих."""
+    ingredients = {
+        name: Ingredient.objects.create(name=name, measurement_unit="г")
+        for name in ("мука", "яйца", "соль", "рис")
+    }
+    result = {}
+    for key, names in (
+            ("a", ("мука", "яйца")),
+            ("b", ("мука", "яйца", "соль")),
+            ("c", ("рис",))):
+        recipe = Recipe.objects.create(
+            author=author, name=f"Рецепт {key}", text="Описание",
+            cooking_time=10, image="recipes/image.png")
+        for name in names:
+            IngredientRecipe.objects.create(
+                recipe=recipe, ingredient=ingredients[name], amount=100)
+        result[key] = recipe
+    return result
+
+
+def ids(response):
+    return [item["id"] for item in response.data]
+
+
+@pytest.mark.django_db
+def test_build_and_serve_recommendations(
+        recipes, user, make_client, django_assert_max_num_queries):
+    Favourite.objects.create(user=user, recipe=recipes["a"])
+
+    call_command("build_recommendations", stdout=StringIO())
+
+    client = make_client(user)
+    a, b, c = recipes["a"], recipes["b"], recipes["c"]
+    assert ids(client.get(f"/api/recipes/{a.pk}/similar/")) == [b.pk]
+    assert ids(client.get(f"/api/recipes/{c.pk}/similar/")) == []
+    assert client.get("/api/recipes/0/similar/").status_code == 404
+    with django_assert_max_num_queries(4):
+        response = client.get("/api/recipes/recommended/")
+    assert ids(response) == [b.pk]
+
+
+@pytest.mark.django_db
+def test_build_new_skips_recipes_without_neighbours(recipes):
+    assert build_new(20, 100) == 3
+    assert not RecipeSimilarity.objects.filter(
+        recipe=recipes["c"]).exists()
+
+    assert build_new(20, 100) == 0
+    assert not Recipe.objects.filter(similar_built_at=None).exists()
@@ -0,0 +1,70 @@
+import pytest
+from django.conf import settings as django_settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from foodgram.routers import PRIMARY_DB, pin_to_replica, unpin
+from recipes.models import Recipe
+from users.models import AuthToken
+
+
+@pytest.fixture
+def databases_used(replica):
+    def run(request):
+        """Базы, в которые пошли запросы во время request()."""
+        with CaptureQueriesContext(connections[PRIMARY_DB]) as primary:
+            with CaptureQueriesContext(connections[replica]) as replicated:
+                response = request()
+        used = {
+            alias for alias, context in (
+                (PRIMARY_DB, primary), (replica, replicated))
+            if len(context)
+        }
+        return response, used
+
+    # Реестр тегов при промахе читает основную БД, прогреваем его заранее.
+    APIClient().get("/api/tags/")
+    return run
+
+
+@pytest.mark.django_db(transaction=True, databases="__all__")
+def test_token_client_reads_primary_after_write(
+        replica, databases_used, user, recipe):
+    _, key = AuthToken.objects.create_token(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {key}")
+
+    response, used = databases_used(lambda: client.get("/api/recipes/"))
+    assert response.status_code == 200
+    assert used == {replica}
+
+    response, used = databases_used(
+        lambda: client.post(f"/api/recipes/{recipe.pk}/favorite/"))
+    assert response.status_code == 201
+    assert used == {PRIMARY_DB}
+
+    response, used = databases_used(lambda: client.get("/api/recipes/"))
+    assert response.data["results"][0]["is_favorited"]
+    assert used == {PRIMARY_DB}
+
+
+@pytest.mark.django_db(transaction=True, databases="__all__")
+def test_sticky_cookie_reads_primary(replica, databases_used, recipe):
+    client = APIClient()
+
+    _, used = databases_used(lambda: client.get("/api/recipes/"))
+    assert used == {replica}
+
+    client.cookies[django_settings.PRIMARY_STICKY_COOKIE] = "1"
+    _, used = databases_used(lambda: client.get("/api/recipes/"))
+    assert used == {PRIMARY_DB}
+
+
+def test_request_reads_from_one_replica(settings):
+    settings.DATABASE_REPLICAS = ["replica1", "replica2"]
+    token = pin_to_replica()
+    try:
+        assert len({Recipe.objects.all().db for _ in range(50)}) == 1
+    finally:
+        unpin(token)
@@ -0,0 +1,58 @@
+import pytest
+
+from recipes.models import Ingredient, IngredientRecipe
+from recipes.snapshots import build_snapshots, refresh_snapshots
+
+
+@pytest.fixture
+def ingredients(recipe):
+    result = [
+        Ingredient.objects.create(name=name, measurement_unit="г")
+        for name in ("мука", "сахар")
+    ]
+    for ingredient in result:
+        IngredientRecipe.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=100)
+    refresh_snapshots([recipe.pk])
+    return result
+
+
+def assert_snapshot_is_fresh(recipe):
+    recipe.refresh_from_db()
+    expected = build_snapshots([recipe.pk])[recipe.pk]
+    assert recipe.ingredients_snapshot == [list(item) for item in expected]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_snapshot_follows_ingredient_changes(
+        local_queue, recipe, ingredients):
+    flour, sugar = ingredients
+
+    flour.name = "мука пшеничная"
+    flour.save()
+    local_queue.join()
+    assert_snapshot_is_fresh(recipe)
+    assert recipe.ingredients_snapshot[0][1] == "мука пшеничная"
+
+    sugar.measurement_unit = "кг"
+    sugar.save(update_fields=["measurement_unit"])
+    local_queue.join()
+    assert_snapshot_is_fresh(recipe)
+    assert recipe.ingredients_snapshot[1][2] == "кг"
+
+    sugar.delete()
+    local_queue.join()
+    assert_snapshot_is_fresh(recipe)
+    assert [item[0] for item in recipe.ingredients_snapshot] == [flour.pk]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_unchanged_ingredient_save_enqueues_nothing(
+        local_queue, monkeypatch, ingredients):
+    enqueued = []
+    monkeypatch.setattr(
+        local_queue, "enqueue", lambda *args: enqueued.append(args))
+
+    ingredients[0].save()
+
+    assert enqueued == []
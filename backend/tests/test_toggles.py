@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+from django.db import connection
+
+from recipes.models import Favourite, ShoppingCart
+from users.models import Subscribe
+
+PARALLEL_REQUESTS = 8
+
+
+def post_in_parallel(make_client, user, url):
+    """Отправить PARALLEL_REQUESTS одинаковых POST одновременно."""
+    barrier = threading.Barrier(PARALLEL_REQUESTS)
+    statuses = []
+    lock = threading.Lock()
+
+    def worker():
+        client = make_client(user)
+        client.raise_request_exception = False
+        barrier.wait()
+        try:
+            response = client.post(url)
+        finally:
+            connection.close()
+        with lock:
+            statuses.append(response.status_code)
+
+    threads = [
+        threading.Thread(target=worker) for _ in range(PARALLEL_REQUESTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(statuses)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    "action, model",
+    [("favorite", Favourite), ("shopping_cart", ShoppingCart)],
+)
+def test_parallel_recipe_toggle(make_client, user, recipe, action, model):
+    statuses = post_in_parallel(
+        make_client, user, f"/api/recipes/{recipe.pk}/{action}/")
+    assert statuses == [201] + [400] * (PARALLEL_REQUESTS - 1)
+    assert model.objects.filter(user=user, recipe=recipe).count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_subscribe(make_client, user, author):
+    statuses = post_in_parallel(
+        make_client, user, f"/api/users/{author.pk}/subscribe/")
+    assert statuses == [201] + [400] * (PARALLEL_REQUESTS - 1)
+    assert Subscribe.objects.filter(user=user, author=author).count() == 1
@@ -0,0 +1,44 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.admin.sites import AdminSite
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.utils import timezone
+
+from users.admin import AuthTokenAdmin
+from users.models import AuthToken
+
+
+@pytest.mark.django_db
+def test_login_removes_expired_tokens(user, author):
+    expired, _ = AuthToken.objects.create_token(user)
+    other, _ = AuthToken.objects.create_token(author)
+    AuthToken.objects.filter(pk__in=[expired.pk, other.pk]).update(
+        expires=timezone.now() - timedelta(seconds=1))
+    valid, _ = AuthToken.objects.create_token(user)
+
+    token, _ = AuthToken.objects.create_token(user)
+
+    assert set(AuthToken.objects.filter(user=user).values_list(
+        "pk", flat=True)) == {valid.pk, token.pk}
+    assert AuthToken.objects.filter(pk=other.pk).exists()
+
+
+@pytest.mark.django_db
+def test_purge_expired_tokens(user, author):
+    expired, _ = AuthToken.objects.create_token(author)
+    AuthToken.objects.filter(pk=expired.pk).update(
+        expires=timezone.now() - timedelta(seconds=1))
+    valid, _ = AuthToken.objects.create_token(user)
+
+    call_command("purge_expired_tokens", stdout=StringIO())
+
+    assert list(AuthToken.objects.values_list("pk", flat=True)) == [valid.pk]
+
+
+def test_tokens_cannot_be_added_in_admin():
+    request = RequestFactory().get("/admin/users/authtoken/add/")
+    admin = AuthTokenAdmin(AuthToken, AdminSite())
+    assert not admin.has_add_permission(request)
@@ -0,0 +1,39 @@
+import pytest
+
+from users.models import Subscribe
+
+
+@pytest.mark.django_db
+def test_user_list_expands_recipes_on_request(make_client, user, recipe):
+    client = make_client(user)
+
+    response = client.get("/api/users/")
+    assert response.status_code == 200
+    assert all("recipes" not in item for item in response.data["results"])
+
+    response = client.get(f"/api/users/{recipe.author_id}/?expand=recipes")
+    assert response.status_code == 200
+    assert response.data["recipes_count"] == 1
+    assert response.data["recipes"][0]["id"] == recipe.pk
+    assert response.data["recipes"][0]["name"] == recipe.name
+
+
+@pytest.mark.django_db
+def test_subscriptions_render_recipe_ids_unless_expanded(
+        make_client, user, recipe):
+    Subscribe.objects.create(user=user, author=recipe.author)
+    client = make_client(user)
+
+    response = client.get("/api/users/subscriptions/")
+    assert response.data["results"][0]["recipes"][0]["id"] == recipe.pk
+
+    response = client.get(
+        "/api/users/subscriptions/?expand=&fields=id,recipes")
+    assert response.data["results"] == [
+        {"id": recipe.author_id, "recipes": [recipe.pk]}]
+
+
+@pytest.mark.django_db
+def test_unknown_expand_is_rejected(make_client, user):
+    response = make_client(user).get("/api/users/?expand=avatar")
+    assert response.status_code == 400
@@ -1,11 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Subscribe, User
+from foodgram.admin_mixins import LargeTableAdminMixin
+from .models import AuthToken, Subscribe, User
 
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
     list_display = (
         "username",
         "id",
@@ -13,13 +14,45 @@ class CustomUserAdmin(UserAdmin):
         "first_name",
         "last_name",
     )
-    search_fields = ("email", "username")
-    list_filter = ("email", "username")
+    list_filter = ("is_staff", "is_superuser", "is_active")
+    exact_search_fields = {
+        "id": int,
+        "email": str,
+        "username": str,
+    }
 
 
 @admin.register(Subscribe)
-class SubscribeAdmin(admin.ModelAdmin):
+class SubscribeAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         "user",
         "author",
     )
+    list_select_related = ("user", "author")
+    raw_id_fields = ("user", "author")
+    exact_search_fields = {
+        "user__email": str,
+        "author__email": str,
+    }
+
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "prefix",
+        "user",
+        "created",
+        "expires",
+    )
+    list_select_related = ("user",)
+    fields = ("user", "prefix", "created", "expires")
+    readonly_fields = ("prefix", "created")
+    raw_id_fields = ("user",)
+    exact_search_fields = {
+        "prefix": str,
+        "user__email": str,
+    }
+
+    def has_add_permission(self, request):
+        # Токен без ключа бесполезен: выпускается только при входе.
+        return False
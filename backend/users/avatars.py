@@ -0,0 +1,166 @@
+"""Загрузка аватаров: проверка размера и формата, уменьшение, замена файлов.
+
+Pillow импортируется только при обработке загрузки, а не при старте
+процесса.
+"""
+import base64
+import binascii
+import io
+import os
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from foodgram.routers import PRIMARY_DB
+
+SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+HEADER_SIZE = 12
+# Кратно 4, чтобы каждая часть base64 декодировалась независимо.
+DECODE_CHUNK = 64 * 1024
+
+
+def image_format(header):
+    """Формат изображения по первым байтам файла."""
+    for signature, name in SIGNATURES:
+        if header.startswith(signature):
+            return name
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    raise ValidationError("Поддерживаются изображения JPEG, PNG, GIF и WebP.")
+
+
+def upload_limit():
+    """Наибольшая длина тела запроса: base64 длиннее файла на треть."""
+    return settings.AVATAR_MAX_BYTES * 4 // 3 + 1024
+
+
+def check_size(size):
+    if size > settings.AVATAR_MAX_BYTES:
+        raise ValidationError(
+            "Размер изображения не должен превышать "
+            f"{settings.AVATAR_MAX_BYTES // 1024} КБ.")
+
+
+def decode_base64(data):
+    """Декодирует data URL по частям.
+
+    Размер проверяется по длине строки до декодирования, формат — по
+    первой части, так что большой или посторонний файл отклоняется без
+    разбора всего тела.
+    """
+    prefix, separator, encoded = data.partition(";base64,")
+    if not separator or not prefix.startswith("data:image/"):
+        raise ValidationError("Ожидается строка data:image/...;base64,...")
+    check_size(len(encoded.rstrip("=")) * 3 // 4)
+    stream = io.BytesIO()
+    for start in range(0, len(encoded), DECODE_CHUNK):
+        try:
+            chunk = base64.b64decode(
+                encoded[start:start + DECODE_CHUNK], validate=True)
+        except binascii.Error:
+            raise ValidationError("Некорректная строка base64.")
+        if not start:
+            image_format(chunk[:HEADER_SIZE])
+        stream.write(chunk)
+    stream.seek(0)
+    return stream
+
+
+def check_upload(upload):
+    """Проверяет загруженный файл по размеру и заголовку, не читая его."""
+    check_size(upload.size)
+    image_format(upload.read(HEADER_SIZE))
+    upload.seek(0)
+    return upload
+
+
+def rendition_name(name, size):
+    """Имя файла уменьшенной копии аватара name."""
+    root, ext = os.path.splitext(name)
+    return f"{root}_{size}{ext}"
+
+
+def downscale(stream):
+    """Уменьшает изображение до каждого из AVATAR_SIZES по большей стороне.
+
+    Возвращает словарь размер -> файл; файлы одного аватара называются
+    по rendition_name от имени самого большого.
+    """
+    from PIL import Image, ImageOps
+
+    sizes = sorted(settings.AVATAR_SIZES, reverse=True)
+    try:
+        image = Image.open(stream)
+        if image.width * image.height > settings.AVATAR_MAX_PIXELS:
+            raise ValidationError("Слишком большое разрешение изображения.")
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        image.draft("RGB", (sizes[0], sizes[0]))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((sizes[0], sizes[0]))
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Файл повреждён или не является изображением.")
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image, fmt, ext = image.convert("RGBA"), "PNG", "png"
+    else:
+        image, fmt, ext = image.convert("RGB"), "JPEG", "jpg"
+    name = f"{uuid.uuid4().hex}.{ext}"
+    renditions = {}
+    for size in sizes:
+        # Каждая копия уменьшается из предыдущей, а не из оригинала.
+        image.thumbnail((size, size))
+        output = io.BytesIO()
+        image.save(output, fmt, optimize=True, quality=85)
+        renditions[size] = ContentFile(
+            output.getvalue(),
+            name=name if size == sizes[0] else rendition_name(name, size))
+    return renditions
+
+
+def delete_avatar(storage, name):
+    """Удаляет файл аватара вместе с уменьшенными копиями."""
+    storage.delete(name)
+    for size in settings.AVATAR_SIZES:
+        storage.delete(rendition_name(name, size))
+
+
+def replace_avatar(user, renditions):
+    """Ставит пользователю новый аватар или убирает его (renditions=None).
+
+    renditions - результат downscale. Новые файлы сохраняются под
+    уникальными именами до записи в БД; строка пользователя блокируется,
+    чтобы прочитать актуальный старый файл. Старые файлы удаляются после
+    коммита, новые - если запись не удалась.
+    """
+    storage = user.avatar.storage
+    new_name = None
+    try:
+        if renditions is not None:
+            largest = max(renditions)
+            user.avatar.save(
+                renditions[largest].name, renditions[largest], save=False)
+            new_name = user.avatar.name
+            for size, content in renditions.items():
+                if size != largest:
+                    storage.save(rendition_name(new_name, size), content)
+        with transaction.atomic(using=PRIMARY_DB):
+            old_name = (
+                type(user).objects.using(PRIMARY_DB).select_for_update()
+                .values_list("avatar", flat=True).get(pk=user.pk)
+            )
+            user.avatar = new_name
+            user.save(update_fields=["avatar"])
+    except Exception:
+        if new_name:
+            delete_avatar(storage, new_name)
+        raise
+    if old_name and old_name != new_name:
+        transaction.on_commit(
+            lambda: delete_avatar(storage, old_name), using=PRIMARY_DB)
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import CachedTokenAuthentication, local_token_cache
+from users.models import AuthToken, User, hash_token_key
+
+
+class Command(BaseCommand):
+    help = "Сравнить скорость проверки токенов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        user = User.objects.order_by("id").first()
+        if user is None:
+            self.stderr.write("Нет пользователей для проверки")
+            return
+        token, key = AuthToken.objects.create_token(user)
+        digest = hash_token_key(key)
+        auth = CachedTokenAuthentication()
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Token {key}")
+        try:
+            self.run(
+                "Token + User целиком (как TokenAuthentication)",
+                iterations,
+                lambda: AuthToken.objects.select_related("user").get(
+                    prefix=token.prefix, digest=digest),
+            )
+            self.run(
+                "Префикс + hmac (без кэша)",
+                iterations,
+                lambda: auth.fetch_entry(key, digest),
+            )
+            local_token_cache.clear()
+            self.run(
+                "CachedTokenAuthentication",
+                iterations,
+                lambda: auth.authenticate(request),
+            )
+        finally:
+            token.delete()
+
+    def run(self, label, iterations, func):
+        func()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label}: {elapsed / iterations * 1e6:.1f} мкс/запрос, "
+            f"{len(queries) / iterations:.2f} SQL/запрос"
+        )
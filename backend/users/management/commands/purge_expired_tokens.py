@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import AuthToken
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Удалить истёкшие токены, в том числе пользователей, которые "
+        "больше не входили. Запускать периодически, например из cron."
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            batch = list(
+                AuthToken.objects.expired(now).order_by("pk")
+                .values_list("pk", flat=True)[:BATCH_SIZE])
+            if not batch:
+                break
+            # Удаление через ORM: сигнал post_delete убирает токен из кэша.
+            AuthToken.objects.filter(pk__in=batch).delete()
+            total += len(batch)
+        self.stdout.write(f"Удалено токенов: {total}")
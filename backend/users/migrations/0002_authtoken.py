@@ -0,0 +1,64 @@
+# Generated by Django 3.2.3 on 2026-10-19 07:46
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "prefix",
+                    models.CharField(
+                        db_index=True, max_length=8, verbose_name="Префикс"
+                    ),
+                ),
+                (
+                    "digest",
+                    models.CharField(max_length=64, verbose_name="Хэш"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Создан"
+                    ),
+                ),
+                (
+                    "expires",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Истекает"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="auth_tokens",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Токен",
+                "verbose_name_plural": "Токены",
+            },
+        ),
+    ]
@@ -1,7 +1,13 @@
+import hashlib
+import hmac
+import secrets
+from datetime import timedelta
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.db.models import UniqueConstraint
+from django.utils import timezone
 
 from .validators import validate_username
 
@@ -66,3 +72,85 @@ class Subscribe(models.Model):
         ]
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
+
+
+def hash_token_key(key):
+    """Ключевой хэш BLAKE2b от токена, сырой токен в БД не хранится."""
+    secret = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
+    return hashlib.blake2b(
+        key.encode(), key=secret, digest_size=32).hexdigest()
+
+
+class AuthTokenManager(models.Manager):
+
+    def create_token(self, user):
+        """Выпустить токен. Сырой ключ возвращается только здесь.
+
+        Истёкшие токены пользователя удаляются заодно, чтобы таблица и
+        индекс префиксов не росли с каждым входом.
+        """
+        now = timezone.now()
+        self.expired(now).filter(user=user).delete()
+        prefix = secrets.token_hex(AuthToken.PREFIX_LENGTH // 2)
+        key = prefix + secrets.token_urlsafe(32)
+        expires = None
+        if settings.AUTH_TOKEN_TTL:
+            expires = now + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+        token = self.create(
+            user=user,
+            prefix=prefix,
+            digest=hash_token_key(key),
+            expires=expires,
+        )
+        return token, key
+
+    def expired(self, now=None):
+        """Истёкшие токены."""
+        return self.filter(expires__lte=now or timezone.now())
+
+    def revoke(self, key):
+        return self.filter(
+            prefix=AuthToken.split_key(key), digest=hash_token_key(key)
+        ).delete()
+
+
+class AuthToken(models.Model):
+    """Класс модели токена авторизации.
+
+    Хранится короткий индексируемый префикс и хэш токена. У пользователя
+    может быть несколько токенов с ограниченным сроком действия.
+    """
+
+    PREFIX_LENGTH = 8
+
+    user = models.ForeignKey(
+        User,
+        related_name="auth_tokens",
+        verbose_name="Пользователь",
+        on_delete=models.CASCADE,
+    )
+    prefix = models.CharField(
+        "Префикс", max_length=PREFIX_LENGTH, db_index=True)
+    digest = models.CharField("Хэш", max_length=64)
+    created = models.DateTimeField("Создан", auto_now_add=True)
+    expires = models.DateTimeField("Истекает", null=True, blank=True)
+
+    objects = AuthTokenManager()
+
+    class Meta:
+        verbose_name = "Токен"
+        verbose_name_plural = "Токены"
+
+    def __str__(self):
+        return f"{self.prefix}... ({self.user_id})"
+
+    @classmethod
+    def split_key(cls, key):
+        return key[:cls.PREFIX_LENGTH]
+
+    def matches(self, key):
+        return hmac.compare_digest(self.digest, hash_token_key(key))
+
+    @property
+    def is_expired(self):
+        return self.expires is not None and self.expires <= timezone.now()